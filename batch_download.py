@@ -0,0 +1,137 @@
+# Данный модуль отвечает за параллельную загрузку данных об акциях сразу по множеству тикеров:
+# ограниченный пул потоков, ограничение частоты запросов и повторные попытки с экспоненциальной задержкой.
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+import pandas as pd
+
+from data_download import NoDataError, fetch_stock_data
+
+# Ошибки, при которых повторять запрос бессмысленно (тикер не существует или офлайн-кэш пуст).
+# Остальные ошибки, в том числе ValueError и KeyError при ограничении частоты или поврежденном ответе, повторяются
+NON_RETRYABLE_ERRORS = (NoDataError,)
+
+
+class RateLimiter:
+    """
+    Ограничивает частоту запросов: не более calls_per_second обращений в секунду суммарно для всех потоков.
+    """
+
+    def __init__(self, calls_per_second):
+        if calls_per_second <= 0:
+            raise ValueError("Частота запросов должна быть положительной.")
+        self.interval = 1.0 / calls_per_second
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Блокирует вызывающий поток до момента, когда разрешен следующий запрос.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BatchResult:
+    """
+    Результат пакетной загрузки.
+    data: словарь тикер -> DataFrame для успешно загруженных тикеров (в порядке запроса).
+    errors: словарь тикер -> исключение для тикеров, которые загрузить не удалось.
+    """
+
+    def __init__(self, data, errors):
+        self.data = data
+        self.errors = errors
+
+    def to_panel(self):
+        """
+        Объединяет данные всех тикеров в одну таблицу с MultiIndex по столбцам (поле, тикер),
+        так что panel['Close'] - это матрица цен закрытия дата x тикер.
+        Даты объединяются; для тикеров без торгов в какую-либо дату ставится NaN.
+        """
+        if not self.data:
+            return pd.DataFrame()
+        panel = pd.concat(self.data, axis=1, names=['Ticker', 'Field'])
+        panel = panel.swaplevel(axis=1)
+        fields = list(dict.fromkeys(panel.columns.get_level_values('Field')))
+        return panel.reindex(columns=pd.MultiIndex.from_product([fields, list(self.data)],
+                                                                names=['Field', 'Ticker']))
+
+    def __repr__(self):
+        return f"BatchResult(успешно={len(self.data)}, ошибок={len(self.errors)})"
+
+
+def fetch_with_retry(fetcher, ticker, retries=3, backoff=1.0, rate_limiter=None, **kwargs):
+    """
+    Вызывает fetcher(ticker, **kwargs), повторяя попытку при временных ошибках.
+    retries: число повторных попыток после первой неудачной.
+    backoff: базовая задержка в секундах; перед n-й повторной попыткой ждем backoff * 2**(n-1) плюс случайный разброс.
+    rate_limiter: экземпляр RateLimiter, общий для всех потоков.
+    """
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            data = fetcher(ticker, **kwargs)
+            if data is None or data.empty:
+                raise NoDataError(f"Данные для тикера {ticker} не найдены.")
+            return data
+        except NON_RETRYABLE_ERRORS:
+            raise
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = backoff * 2 ** attempt * (1 + random.random() * 0.1)
+            attempt += 1
+            logging.warning(f"Попытка {attempt} для тикера {ticker} не удалась ({e}), повтор через {delay:.1f} с")
+            time.sleep(delay)
+
+
+def fetch_many(tickers, period='1mo', start=None, end=None, interval='1d', max_workers=8,
+               calls_per_second=None, retries=3, backoff=1.0, fetcher=None, cache=None):
+    """
+    Загружает исторические данные сразу для списка тикеров параллельно.
+    tickers: список тикеров, например, ['AAPL', 'MSFT'].
+    period, start, end, interval: параметры периода, как в fetch_stock_data.
+    max_workers: размер пула потоков.
+    calls_per_second: ограничение частоты запросов (None - без ограничения).
+    retries, backoff: число повторных попыток и базовая задержка между ними.
+    fetcher: функция загрузки с сигнатурой fetch_stock_data; позволяет подставить локальный источник данных.
+    cache: экземпляр data_cache.StockDataCache (используется, только если fetcher не указан).
+    Ошибки по отдельным тикерам не прерывают загрузку, а собираются в BatchResult.errors.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if fetcher is None:
+        fetcher = partial(fetch_stock_data, cache=cache)
+    rate_limiter = RateLimiter(calls_per_second) if calls_per_second else None
+
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_with_retry, fetcher, ticker, retries=retries, backoff=backoff,
+                            rate_limiter=rate_limiter, period=period, start=start, end=end,
+                            interval=interval): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                logging.error(f"Не удалось загрузить данные для тикера {ticker}: {e}")
+                errors[ticker] = e
+
+    logging.info(f"Пакетная загрузка завершена: успешно {len(results)}, с ошибками {len(errors)}")
+    ordered = {ticker: results[ticker] for ticker in tickers if ticker in results}
+    return BatchResult(ordered, errors)
@@ -0,0 +1,296 @@
+# Данный модуль отвечает за неинтерактивный пакетный запуск: загрузку данных, расчет индикаторов
+# и построение графиков по описанию заданий из аргументов командной строки или JSON/YAML файла.
+# Этапы выполняются конвейером: пока загружаются данные следующих тикеров, для уже загруженных
+# рассчитываются индикаторы и строятся графики в отдельных процессах.
+#
+# Пример запуска:
+#   python batch_runner.py --tickers AAPL MSFT --period 6mo --outputs price rsi macd csv
+#   python batch_runner.py --spec jobs.json
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+
+import data_download as dd
+import data_plotting as dplt
+import instrumentation
+from batch_download import RateLimiter, fetch_with_retry
+from data_cache import StockDataCache
+from indicator_pipeline import IndicatorPipeline
+
+# Индикаторы, необходимые для каждого вида результата
+OUTPUT_INDICATORS = {
+    'price': ['Moving_Average'],
+    'std_dev': [],
+    'rsi': ['RSI'],
+    'macd': ['MACD', 'Signal_Line'],
+    'csv': [],
+    'html': ['Moving_Average'],
+}
+
+# Интерактивные HTML-графики: не более 2000 точек на линию и не более 500 КБ данных на страницу;
+# plotly.min.js сохраняется один раз рядом со страницами
+HTML_OPTIONS = {'max_points': 2000, 'size_budget': 500000, 'zoom_detail': True, 'include_plotlyjs': 'directory'}
+
+DEFAULT_JOB = {
+    'tickers': [],
+    'periods': ['1mo'],
+    'ranges': [],
+    'interval': '1d',
+    'indicators': ['Moving_Average', 'RSI', 'MACD', 'Signal_Line'],
+    'outputs': ['price', 'std_dev', 'rsi', 'macd'],
+    'style': 'default',
+    'output_dir': 'output',
+}
+
+
+def load_job_spec(filename):
+    """
+    Загружает описание заданий из JSON или YAML файла (для YAML требуется библиотека PyYAML).
+    Файл содержит либо одно задание, либо словарь с ключом 'jobs' и общими настройками
+    ('max_workers', 'render_workers', 'retries', 'calls_per_second', 'cache_dir').
+    """
+    with open(filename, encoding='utf-8') as f:
+        if filename.endswith(('.yaml', '.yml')):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if 'jobs' not in spec:
+        spec = {'jobs': [spec]}
+    return spec
+
+
+def normalize_job(job, number):
+    """
+    Дополняет задание значениями по умолчанию и проверяет его корректность.
+    Поля задания: 'name', 'tickers', 'period' или 'periods', 'start'/'end' или 'ranges',
+    'interval', 'indicators', 'outputs', 'style', 'output_dir'.
+    """
+    normalized = {**DEFAULT_JOB, 'name': f"job{number}", **job}
+    if 'period' in job:
+        normalized['periods'] = [job['period']]
+    if 'start' in job or 'end' in job:
+        normalized['ranges'] = [{'start': job.get('start'), 'end': job.get('end')}]
+        if 'period' not in job and 'periods' not in job:
+            normalized['periods'] = []
+    if not normalized['tickers']:
+        raise ValueError(f"В задании {normalized['name']} не указаны тикеры.")
+
+    unknown = [output for output in normalized['outputs'] if output not in OUTPUT_INDICATORS]
+    if unknown:
+        raise ValueError(f"Неизвестные виды результатов: {', '.join(unknown)}")
+    # Добавляем индикаторы, без которых не построить запрошенные графики
+    indicators = list(normalized['indicators'])
+    for output in normalized['outputs']:
+        indicators.extend(OUTPUT_INDICATORS[output])
+    normalized['indicators'] = list(dict.fromkeys(indicators))
+    return normalized
+
+
+def expand_tasks(job):
+    """
+    Разворачивает задание в список задач (тикер, параметры периода, подпись периода).
+    """
+    tasks = []
+    for ticker in job['tickers']:
+        for period in job['periods']:
+            tasks.append((ticker, {'period': period}, period))
+        for date_range in job['ranges']:
+            label = f"{date_range['start']} to {date_range['end']}"
+            tasks.append((ticker, {'start': date_range['start'], 'end': date_range['end']}, label))
+    return tasks
+
+
+def _timed_fetch(fetcher, ticker, fetch_params, interval, retries, rate_limiter):
+    started = time.perf_counter()
+    data = fetch_with_retry(fetcher, ticker, retries=retries, rate_limiter=rate_limiter, interval=interval,
+                            **fetch_params)
+    return data, time.perf_counter() - started
+
+
+def _init_render_worker():
+    # Рабочий процесс может получить копию реестра замеров родителя (при запуске через fork);
+    # очищаем его, чтобы в основной процесс возвращались только собственные записи рабочего процесса
+    instrumentation.clear_records()
+    dplt.set_headless()
+
+
+def _timed_render(job):
+    # Выполняется в рабочем процессе: возвращает путь к графику, время построения
+    # и записи замеров, сделанные в этом процессе, чтобы передать их в основной процесс
+    started = time.perf_counter()
+    filepath = dplt.render_chart(job)
+    elapsed = time.perf_counter() - started
+    metrics = instrumentation.get_records()
+    instrumentation.clear_records()
+    return filepath, elapsed, metrics
+
+
+def run_job(job, fetch_executor, render_executor, fetcher, retries=3, rate_limiter=None):
+    """
+    Выполняет одно задание конвейером и возвращает сводку: время этапов, число успешных задач и ошибки.
+    """
+    started = time.perf_counter()
+    summary = {'name': job['name'], 'tasks': 0, 'succeeded': 0, 'failures': {},
+               'fetch_time': 0.0, 'compute_time': 0.0, 'render_time': 0.0, 'wall_time': 0.0}
+    pipeline = IndicatorPipeline(job['indicators'])
+    tasks = expand_tasks(job)
+    summary['tasks'] = len(tasks)
+    os.makedirs(job['output_dir'], exist_ok=True)
+
+    fetch_futures = {
+        fetch_executor.submit(_timed_fetch, fetcher, ticker, fetch_params, job['interval'], retries,
+                              rate_limiter): (ticker, label)
+        for ticker, fetch_params, label in tasks
+    }
+    render_futures = {}
+
+    # Обрабатываем задачи в порядке завершения загрузки, не дожидаясь остальных тикеров
+    for future in as_completed(fetch_futures):
+        ticker, label = fetch_futures[future]
+        key = f"{ticker} ({label})"
+        try:
+            data, fetch_time = future.result()
+            summary['fetch_time'] += fetch_time
+
+            compute_started = time.perf_counter()
+            data = data.join(pipeline.compute(data))
+            for output in job['outputs']:
+                if output == 'csv':
+                    dd.export_data_to_csv(data, os.path.join(job['output_dir'], f"{ticker}_{label}.csv"))
+                    continue
+                render_job = {'kind': output, 'data': data[dplt.chart_columns(output, data)],
+                              'ticker': ticker, 'period': label}
+                if output == 'html':
+                    render_job.update(HTML_OPTIONS, filename=dplt.chart_filename(ticker, label, 'interactive.html'))
+                else:
+                    render_job['style'] = job['style']
+                if output == 'std_dev':
+                    render_job['std_dev'] = data['Close'].std()
+                render_futures[render_executor.submit(_timed_render, render_job)] = key
+            summary['compute_time'] += time.perf_counter() - compute_started
+        except Exception as e:
+            logging.error(f"Задача {key} завершилась с ошибкой: {e}")
+            summary['failures'][key] = e
+
+    for future in as_completed(render_futures):
+        key = render_futures[future]
+        try:
+            _, render_time, metrics = future.result()
+            summary['render_time'] += render_time
+            instrumentation.add_records(metrics)
+        except Exception as e:
+            logging.error(f"Не удалось построить график для {key}: {e}")
+            summary['failures'].setdefault(key, e)
+
+    summary['succeeded'] = summary['tasks'] - len(summary['failures'])
+    summary['wall_time'] = time.perf_counter() - started
+    return summary
+
+
+def run_jobs(spec, fetcher=None):
+    """
+    Выполняет все задания из описания spec (результат load_job_spec или jobs_from_args).
+    fetcher: функция загрузки с сигнатурой fetch_stock_data; позволяет подставить локальный источник данных.
+    Возвращает список сводок по заданиям.
+    """
+    jobs = [normalize_job(job, number) for number, job in enumerate(spec['jobs'], start=1)]
+    if fetcher is None:
+        cache = StockDataCache(spec['cache_dir']) if spec.get('cache_dir') else None
+        fetcher = partial(dd.fetch_stock_data, cache=cache)
+    rate_limiter = RateLimiter(spec['calls_per_second']) if spec.get('calls_per_second') else None
+
+    # Процессы построения графиков создаются без fork: к моменту первого submit уже работают потоки загрузки
+    summaries = []
+    with ThreadPoolExecutor(max_workers=spec.get('max_workers', 8)) as fetch_executor, \
+            ProcessPoolExecutor(max_workers=spec.get('render_workers'), mp_context=dplt.process_pool_context(),
+                                initializer=_init_render_worker) as render_executor:
+        for job in jobs:
+            summaries.append(run_job(job, fetch_executor, render_executor, fetcher,
+                                     retries=spec.get('retries', 3), rate_limiter=rate_limiter))
+    return summaries
+
+
+def print_summary(summaries):
+    """
+    Выводит сводку по заданиям: время этапов и ошибки.
+    """
+    print(f"{'Задание':<20}{'Задач':>7}{'Успешно':>9}{'Загрузка, с':>13}{'Расчет, с':>11}"
+          f"{'Графики, с':>12}{'Всего, с':>10}")
+    for summary in summaries:
+        print(f"{summary['name']:<20}{summary['tasks']:>7}{summary['succeeded']:>9}"
+              f"{summary['fetch_time']:>13.2f}{summary['compute_time']:>11.2f}"
+              f"{summary['render_time']:>12.2f}{summary['wall_time']:>10.2f}")
+        for key, error in summary['failures'].items():
+            print(f"    Ошибка {key}: {error}")
+
+
+def jobs_from_args(args):
+    """
+    Строит описание заданий из аргументов командной строки.
+    """
+    if args.spec:
+        spec = load_job_spec(args.spec)
+    else:
+        job = {'tickers': args.tickers, 'interval': args.interval, 'style': args.style, 'output_dir': args.output_dir}
+        if args.start or args.end:
+            job['start'], job['end'] = args.start, args.end
+        else:
+            job['periods'] = args.period
+        if args.indicators:
+            job['indicators'] = args.indicators
+        if args.outputs:
+            job['outputs'] = args.outputs
+        spec = {'jobs': [job]}
+
+    for option in ('max_workers', 'render_workers', 'retries', 'calls_per_second', 'cache_dir'):
+        value = getattr(args, option)
+        if value is not None:
+            spec[option] = value
+    return spec
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная загрузка данных об акциях, расчет индикаторов "
+                                                 "и построение графиков")
+    parser.add_argument('--spec', help="JSON/YAML файл с описанием заданий")
+    parser.add_argument('--tickers', nargs='+', default=[], help="тикеры, например, AAPL MSFT")
+    parser.add_argument('--period', nargs='+', default=['1mo'], help="предустановленные периоды, например, 1mo 6mo")
+    parser.add_argument('--start', help="дата начала в формате YYYY-MM-DD")
+    parser.add_argument('--end', help="дата окончания в формате YYYY-MM-DD")
+    parser.add_argument('--interval', default='1d', help="интервал баров, например, 1d")
+    parser.add_argument('--indicators', nargs='+', help="индикаторы, например, Moving_Average RSI MACD")
+    parser.add_argument('--outputs', nargs='+', help=f"результаты: {', '.join(OUTPUT_INDICATORS)}")
+    parser.add_argument('--style', default='default', help="стиль графиков matplotlib")
+    parser.add_argument('--output-dir', default=DEFAULT_JOB['output_dir'], help="папка для CSV файлов")
+    parser.add_argument('--max-workers', type=int, help="число потоков загрузки")
+    parser.add_argument('--render-workers', type=int, help="число процессов построения графиков")
+    parser.add_argument('--retries', type=int, help="число повторных попыток загрузки")
+    parser.add_argument('--calls-per-second', type=float, help="ограничение частоты запросов")
+    parser.add_argument('--cache-dir', help="папка дискового кэша данных")
+    parser.add_argument('--metrics', help="файл JSON Lines для выгрузки замеров этапов по завершении")
+    args = parser.parse_args(argv)
+    if not args.spec and not args.tickers:
+        parser.error("укажите --spec или --tickers")
+    return args
+
+
+def main(argv=None):
+    dd.setup_logging()
+    args = parse_args(argv)
+    spec = jobs_from_args(args)
+    summaries = run_jobs(spec)
+    print_summary(summaries)
+    if args.metrics:
+        instrumentation.dump_metrics(args.metrics)
+    return 1 if any(summary['failures'] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
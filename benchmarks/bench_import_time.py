@@ -0,0 +1,66 @@
+"""
+Бенчмарк времени холодного запуска: сколько стоит импорт модулей проекта в новом процессе интерпретатора
+(как у короткоживущих рабочих процессов). Используется встроенный режим python -X importtime:
+для каждого модуля проекта выводится суммарное время импорта, самые тяжелые зависимости
+и то, подтянулись ли при импорте библиотеки построения графиков и загрузки данных.
+Для сравнения замеряется импорт тех библиотек, которые раньше загружались вместе с data_download
+(yfinance, matplotlib.pyplot, pandas, plotly).
+
+Запуск из корня проекта: python -m benchmarks.bench_import_time --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'data_download': 'import data_download',
+    'data_plotting': 'import data_plotting',
+    'panel_indicators': 'import panel_indicators',
+    'batch_runner': 'import batch_runner',
+    'стек до изменений': 'import yfinance, matplotlib.pyplot, pandas, plotly.graph_objs',
+}
+
+HEAVY_PACKAGES = ('matplotlib', 'plotly', 'yfinance', 'pandas')
+
+
+def import_profile(statement):
+    """
+    Импортирует модули в новом процессе с -X importtime и возвращает
+    (суммарное время в микросекундах, список (время, модуль) верхнего уровня, множество импортированных модулей).
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=PROJECT_DIR,
+                               capture_output=True, text=True, check=True)
+    total, top_level, modules = 0, [], set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        cumulative, name = int(fields[1]), fields[2]
+        modules.add(name.strip())
+        # Модули верхнего уровня выводятся без дополнительного отступа
+        if not name.startswith('   '):
+            total += cumulative
+            top_level.append((cumulative, name.strip()))
+    return total, sorted(top_level, reverse=True), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта модулей проекта в новом процессе")
+    parser.add_argument('--repeat', type=int, default=5, help="число запусков (берется минимум)")
+    parser.add_argument('--top', type=int, default=3, help="сколько самых тяжелых зависимостей показать")
+    args = parser.parse_args()
+
+    for label, statement in TARGETS.items():
+        runs = [import_profile(statement) for _ in range(args.repeat)]
+        total, top_level, modules = min(runs, key=lambda run: run[0])
+        heavy = [package for package in HEAVY_PACKAGES if package in modules]
+        print(f"{label:<20}{total / 1000:>9.1f} мс   тяжелые пакеты: {', '.join(heavy) or 'нет'}")
+        for cumulative, name in top_level[:args.top]:
+            print(f"{'':<24}{name:<30}{cumulative / 1000:>9.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
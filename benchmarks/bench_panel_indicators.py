@@ -0,0 +1,63 @@
+"""
+Бенчмарк пакетного расчета индикаторов: цикл по тикерам с однотикерными функциями data_download
+против calculate_panel_indicators на матрице дата x тикер.
+Запуск из корня проекта: python -m benchmarks.bench_panel_indicators --tickers 500 --years 10
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+import data_download as dd
+from benchmarks.synthetic import generate_universe
+from panel_indicators import calculate_panel_indicators, close_panel
+
+
+def run_loop(closes):
+    results = {}
+    for ticker in closes.columns:
+        data = closes[[ticker]].dropna().rename(columns={ticker: 'Close'})
+        data = dd.add_moving_average(data)
+        data = dd.calculate_rsi(data)
+        results[ticker] = dd.calculate_macd(data)
+    return results
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение однотикерного и пакетного расчета индикаторов")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Отключаем информационные сообщения: однотикерные функции пишут в лог на каждый вызов
+    logging.disable(logging.INFO)
+
+    closes = close_panel(generate_universe(args.tickers, args.years * 252))
+    loop_time, loop_results = best_of(lambda: run_loop(closes), args.repeat)
+    panel_time, panel_results = best_of(lambda: calculate_panel_indicators(closes), args.repeat)
+
+    # Проверяем, что результаты совпадают
+    for ticker, data in loop_results.items():
+        for name, panel in panel_results.items():
+            np.testing.assert_allclose(panel[ticker].loc[data.index].to_numpy(), data[name].to_numpy(),
+                                       rtol=1e-9, atol=1e-9)
+
+    print(f"{args.tickers} тикеров x {closes.shape[0]} баров")
+    print(f"Цикл по тикерам:   {loop_time:.3f} с")
+    print(f"Пакетный расчет:   {panel_time:.3f} с")
+    print(f"Ускорение:         {loop_time / panel_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
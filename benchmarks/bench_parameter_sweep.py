@@ -0,0 +1,76 @@
+"""
+Бенчмарк перебора параметров индикаторов: цикл по тикерам и окнам с однотикерными функциями data_download
+против sweep_indicators с общими префиксными суммами и EMA.
+Запуск из корня проекта: python -m benchmarks.bench_parameter_sweep --tickers 20 --years 10 --workers 1
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+import data_download as dd
+from benchmarks.synthetic import generate_universe
+from panel_indicators import close_panel
+from parameter_sweep import sweep_indicators
+
+MA_WINDOWS = range(5, 201)
+RSI_WINDOWS = range(2, 51)
+MACD_SHORT = range(6, 16, 2)
+MACD_LONG = range(20, 41, 4)
+MACD_SIGNAL = (5, 9, 12)
+
+
+def run_loop(closes):
+    results = {}
+    for ticker in closes.columns:
+        data = closes[[ticker]].dropna().rename(columns={ticker: 'Close'})
+        results[(ticker, 'Moving_Average')] = [dd.add_moving_average(data.copy(), window)['Moving_Average']
+                                               for window in MA_WINDOWS]
+        results[(ticker, 'RSI')] = [dd.calculate_rsi(data.copy(), window)['RSI'] for window in RSI_WINDOWS]
+        results[(ticker, 'Signal_Line')] = [dd.calculate_macd(data.copy(), short, long, signal)['Signal_Line']
+                                            for short in MACD_SHORT for long in MACD_LONG if short < long
+                                            for signal in MACD_SIGNAL]
+    return results
+
+
+def run_sweep(closes, workers):
+    return sweep_indicators(closes, ma_windows=MA_WINDOWS, rsi_windows=RSI_WINDOWS, macd_short=MACD_SHORT,
+                            macd_long=MACD_LONG, macd_signal=MACD_SIGNAL, max_workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение цикла по параметрам и перебора с общими вычислениями")
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1, help="число процессов для sweep_indicators")
+    args = parser.parse_args()
+
+    # Отключаем информационные сообщения: однотикерные функции пишут в лог на каждый вызов
+    logging.disable(logging.INFO)
+
+    closes = close_panel(generate_universe(args.tickers, args.years * 252))
+    started = time.perf_counter()
+    loop_results = run_loop(closes)
+    loop_time = time.perf_counter() - started
+    started = time.perf_counter()
+    sweep_results = run_sweep(closes, args.workers)
+    sweep_time = time.perf_counter() - started
+
+    # Проверяем, что результаты совпадают
+    for (ticker, name), series_list in loop_results.items():
+        column = sweep_results[name].tickers.index(ticker)
+        rows = closes.index.get_indexer(series_list[0].index)
+        for position, series in enumerate(series_list):
+            np.testing.assert_allclose(sweep_results[name].values[rows, position, column], series.to_numpy(),
+                                       rtol=1e-8, atol=1e-8)
+
+    n_params = sum(len(result.params) for result in sweep_results.values())
+    print(f"{args.tickers} тикеров x {closes.shape[0]} баров, наборов параметров: {n_params}")
+    print(f"Цикл по параметрам: {loop_time:.3f} с")
+    print(f"Перебор:            {sweep_time:.3f} с")
+    print(f"Ускорение:          {loop_time / sweep_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Проверка совпадения потокового расчета индикаторов (streaming_indicators) с пакетными функциями data_download
+на синтетических данных: индикаторы инициализируются по началу истории разной длины, сохраняются в JSON
+и восстанавливаются, после чего остальные бары подаются по одному. Также проверяется расчет по порциям
+(iter_indicator_chunks) с порциями разного размера. При расхождении скрипт завершается ошибкой.
+
+Запуск из корня проекта: python -m benchmarks.check_streaming --rows 1000
+"""
+import argparse
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+from benchmarks.synthetic import generate_ohlcv
+from streaming_indicators import StreamingIndicators, iter_indicator_chunks
+
+COLUMNS = ['Moving_Average', 'RSI', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line']
+
+
+def batch_indicators(data):
+    return dd.calculate_macd(dd.calculate_rsi(dd.add_moving_average(data.copy())))[COLUMNS]
+
+
+def assert_same(actual, expected, label):
+    np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9, atol=1e-9,
+                               err_msg=label)
+
+
+def check_streaming(data, expected, seed_lengths):
+    with tempfile.TemporaryDirectory() as directory:
+        for seed in seed_lengths:
+            indicators = StreamingIndicators.from_history(data.iloc[:seed])
+            # Состояние проходит через JSON, как при перезапуске процесса
+            state_path = os.path.join(directory, 'state.json')
+            indicators.save(state_path)
+            indicators = StreamingIndicators.load(state_path)
+            assert_same(indicators.update_many(data.iloc[seed:]), expected.iloc[seed:],
+                        f"потоковый расчет, начальная история {seed} баров")
+            print(f"Потоковый расчет, начальная история {seed:>5} баров: совпадает")
+
+
+def check_chunks(data, expected, chunk_sizes):
+    for size in chunk_sizes:
+        chunks = (data.iloc[start:start + size] for start in range(0, len(data), size))
+        result = pd.concat(list(iter_indicator_chunks(chunks)))
+        assert result.index.equals(data.index), f"расчет по порциям из {size} баров: индекс не совпадает"
+        assert_same(result[COLUMNS], expected, f"расчет по порциям из {size} баров")
+        print(f"Расчет по порциям из {size:>5} баров: совпадает")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка совпадения потокового и пакетного расчета индикаторов")
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    data = generate_ohlcv(args.rows, seed=args.seed)
+    expected = batch_indicators(data)
+    check_streaming(data, expected, seed_lengths=[1, 3, 10, 14, 26, 100])
+    check_chunks(data, expected, chunk_sizes=[1, 3, 7, 50, args.rows])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Воспроизводимый набор бенчмарков для расчета индикаторов (data_download) и построения графиков (data_plotting)
+на синтетических OHLCV-данных. Результаты сохраняются в JSON и сравниваются с сохраненным базовым прогоном,
+чтобы находить регрессии производительности без доступа к сети.
+
+Запуск из корня проекта:
+    python -m benchmarks.run_benchmarks                        # быстрый профиль, сравнение с benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --profile full         # от 1 тыс. до 10 млн строк и от 1 до 1000 тикеров
+    python -m benchmarks.run_benchmarks --save-baseline        # обновить базовый прогон
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_download as dd
+import data_plotting as dplt
+from benchmarks.synthetic import generate_ohlcv, generate_universe
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Профили: размеры одиночных рядов, число тикеров (по 252 бара на тикер) и размеры рядов для графиков
+PROFILES = {
+    'quick': {'rows': [1000, 10000, 100000], 'tickers': [1, 10, 100], 'plot_rows': [1000, 10000]},
+    'full': {'rows': [1000, 10000, 100000, 1000000, 10000000], 'tickers': [1, 10, 100, 1000],
+             'plot_rows': [1000, 10000, 100000, 1000000]},
+}
+
+INDICATORS = {
+    'add_moving_average': dd.add_moving_average,
+    'calculate_rsi': dd.calculate_rsi,
+    'calculate_macd': dd.calculate_macd,
+    'calculate_standard_deviation': dd.calculate_standard_deviation,
+}
+
+PLOTS = {
+    'create_and_save_plot': lambda data: dplt.create_and_save_plot(data, 'BENCH', 'bench', show=False),
+    'plot_standard_deviation': lambda data: dplt.plot_standard_deviation(data, 'BENCH', 'bench',
+                                                                         data['Close'].std(), show=False),
+    'plot_rsi': lambda data: dplt.plot_rsi(data, 'BENCH', 'bench', show=False),
+    'plot_macd': lambda data: dplt.plot_macd(data, 'BENCH', 'bench', show=False),
+}
+
+
+def measure(func, make_input, repeat, min_time=0.2):
+    """
+    Выполняет repeat серий замеров func(make_input()) и возвращает среднее время одного запуска в каждой серии.
+    В каждой серии функция запускается, пока суммарное время запусков не достигнет min_time секунд
+    (как timeit.Timer.autorange), чтобы быстрые замеры не тонули в шуме таймера и планировщика.
+    Подготовка входных данных (копирование DataFrame) в замер не входит, вывод функций на консоль подавляется.
+    """
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            total, number = 0.0, 0
+            while total < min_time or number == 0:
+                data = make_input()
+                started = time.perf_counter()
+                func(data)
+                total += time.perf_counter() - started
+                number += 1
+            timings.append(total / number)
+    return timings
+
+
+def record(name, rows, tickers, timings):
+    return {'name': name, 'rows': rows, 'tickers': tickers, 'min': min(timings),
+            'mean': sum(timings) / len(timings), 'repeat': len(timings)}
+
+
+def run_indicator_benchmarks(profile, repeat, seed, min_time):
+    results = []
+    for rows in profile['rows']:
+        data = generate_ohlcv(rows, seed=seed)
+        for name, func in INDICATORS.items():
+            timings = measure(func, data.copy, repeat, min_time)
+            results.append(record(name, rows, 1, timings))
+            print(f"{name:<32}{rows:>10} строк {min(timings):>10.4f} с")
+
+    for tickers in profile['tickers']:
+        universe = generate_universe(tickers, 252, seed=seed)
+        total_rows = sum(len(data) for data in universe.values())
+        for name, func in INDICATORS.items():
+            def run_universe(frames, func=func):
+                for data in frames.values():
+                    func(data)
+            timings = measure(run_universe, lambda: {t: d.copy() for t, d in universe.items()}, repeat,
+                              min_time)
+            results.append(record(name, total_rows, tickers, timings))
+            print(f"{name:<32}{tickers:>10} тикеров {min(timings):>8.4f} с")
+    return results
+
+
+def run_plot_benchmarks(profile, repeat, seed, min_time):
+    results = []
+    dplt.set_headless()
+    # Замеряем само построение: без отключения кэша повторные запуски брали бы готовые файлы
+    original_cache = dplt.render_cache
+    dplt.set_render_cache(False)
+    original_dir = dplt.images_dir
+    with tempfile.TemporaryDirectory() as images_dir:
+        dplt.images_dir = images_dir
+        try:
+            for rows in profile['plot_rows']:
+                data = generate_ohlcv(rows, seed=seed)
+                data = dd.calculate_macd(dd.calculate_rsi(dd.add_moving_average(data)))
+                for name, func in PLOTS.items():
+                    timings = measure(func, lambda: data, repeat, min_time)
+                    results.append(record(name, rows, 1, timings))
+                    print(f"{name:<32}{rows:>10} строк {min(timings):>10.4f} с")
+        finally:
+            dplt.images_dir = original_dir
+            dplt.set_render_cache(original_cache)
+    return results
+
+
+def compare(results, baseline, tolerance, abs_tolerance=0.005):
+    """
+    Сравнивает результаты с базовым прогоном по минимальному времени.
+    Возвращает список регрессий: замеры, ставшие медленнее более чем на tolerance (доля, например 0.25)
+    и одновременно более чем на abs_tolerance секунд. Абсолютный допуск нужен для коротких замеров
+    (единицы миллисекунд), у которых относительный разброс между запусками велик.
+    """
+    base = {(item['name'], item['rows'], item['tickers']): item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        reference = base.get((item['name'], item['rows'], item['tickers']))
+        if reference is None:
+            continue
+        ratio = item['min'] / reference['min'] if reference['min'] > 0 else 1.0
+        if ratio > 1 + tolerance and item['min'] - reference['min'] > abs_tolerance:
+            regressions.append({**item, 'baseline': reference['min'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки расчета индикаторов и построения графиков")
+    parser.add_argument('--profile', choices=PROFILES, default='quick')
+    parser.add_argument('--repeat', type=int, default=5, help="число серий замеров, берется лучшая")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help="файл для сохранения результатов")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл базового прогона для сравнения")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="допустимое замедление (доля)")
+    parser.add_argument('--abs-tolerance', type=float, default=0.005,
+                        help="допустимое замедление в секундах: меньшие отклонения не считаются регрессией")
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="минимальное суммарное время запусков в одной серии замеров, с")
+    parser.add_argument('--save-baseline', action='store_true', help="сохранить результаты как базовый прогон")
+    parser.add_argument('--skip-plots', action='store_true', help="не замерять построение графиков")
+    args = parser.parse_args(argv)
+
+    # Однотикерные функции пишут в лог и на консоль при каждом вызове - отключаем лог на время замеров
+    logging.disable(logging.INFO)
+
+    profile = PROFILES[args.profile]
+    results = run_indicator_benchmarks(profile, args.repeat, args.seed, args.min_time)
+    if not args.skip_plots:
+        results += run_plot_benchmarks(profile, args.repeat, args.seed, args.min_time)
+
+    report = {
+        'meta': {'profile': args.profile, 'seed': args.seed, 'repeat': args.repeat, 'min_time': args.min_time,
+                 'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                 'platform': platform.platform(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Базовый прогон сохранен в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Базовый прогон не найден, сравнение пропущено.")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.abs_tolerance)
+    for item in regressions:
+        print(f"Регрессия: {item['name']} ({item['rows']} строк, {item['tickers']} тикеров): "
+              f"{item['min']:.4f} с против {item['baseline']:.4f} с ({item['ratio']:.2f}x)")
+    if not regressions:
+        print(f"Регрессий относительно {args.baseline} не найдено "
+              f"(допуск {args.tolerance:.0%} и {args.abs_tolerance * 1000:.0f} мс).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
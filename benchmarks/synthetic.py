@@ -0,0 +1,57 @@
+"""
+Генератор синтетических OHLCV-данных в той же схеме, что возвращает yfinance:
+столбцы Open, High, Low, Close, Volume, Dividends, Stock Splits и DatetimeIndex 'Date' с часовым поясом биржи.
+Данные детерминированы параметром seed, поэтому бенчмарки воспроизводимы без доступа к сети.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+
+def generate_ohlcv(n_rows, seed=0, start='2000-01-03', freq=None, tz='America/New_York', start_price=100.0):
+    """
+    Создает DataFrame с n_rows барами: цены - геометрическое случайное блуждание, объем - логнормальный.
+    freq: частота баров; по умолчанию рабочие дни, а для длинных рядов (более 50 000 баров) - минуты,
+    чтобы даты не выходили за допустимый диапазон pandas.
+    """
+    rng = np.random.default_rng(seed)
+    if freq is None:
+        freq = 'B' if n_rows <= 50000 else 'min'
+    index = pd.date_range(start, periods=n_rows, freq=freq, tz=tz, name='Date')
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    open_ = np.empty(n_rows)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, 0.002, n_rows - 1))
+    spread = np.abs(rng.normal(0, 0.005, n_rows))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(mean=15, sigma=0.5, size=n_rows).astype(np.int64)
+
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume,
+        'Dividends': np.zeros(n_rows),
+        'Stock Splits': np.zeros(n_rows),
+    }, index=index)
+
+
+def generate_universe(n_tickers, n_rows, seed=0, staggered=True, **kwargs):
+    """
+    Создает словарь тикер -> DataFrame для n_tickers тикеров с независимыми (но воспроизводимыми) ценами.
+    staggered: если True, история части тикеров начинается позже, как у недавно размещенных компаний.
+    kwargs: дополнительные параметры generate_ohlcv.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n_tickers)
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for number, ticker_seed in enumerate(seeds):
+        data = generate_ohlcv(n_rows, seed=ticker_seed, **kwargs)
+        if staggered:
+            data = data.iloc[rng.integers(0, max(1, n_rows // 4)):]
+        universe[f"T{number:04d}"] = data
+    return universe
@@ -0,0 +1,114 @@
+# Данный модуль отвечает за загрузку длинных историй (прежде всего внутридневных) по частям.
+# Источник данных ограничивает длину диапазона одного запроса (например, для минутных баров - 7 дней),
+# поэтому диапазон start/end разбивается на окна допустимой длины, окна загружаются параллельно,
+# а результат выдается генератором порций по возрастанию дат со склейкой и удалением повторов на границах.
+# В памяти одновременно находится не больше max_workers загружаемых порций, а не вся история.
+# Расчет индикаторов по порциям с переносом состояния - streaming_indicators.iter_indicator_chunks.
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from batch_download import fetch_with_retry
+from data_cache import resolve_date_range, slice_date_range
+from data_download import NoDataError
+from instrumentation import stage
+
+# Максимальная длина диапазона одного запроса в днях для внутридневных интервалов
+PROVIDER_WINDOW_DAYS = {
+    '1m': 7,
+    '2m': 60,
+    '5m': 60,
+    '15m': 60,
+    '30m': 60,
+    '60m': 730,
+    '90m': 60,
+    '1h': 730,
+}
+
+
+def split_date_range(start, end, interval='1m', chunk_days=None):
+    """
+    Разбивает полуинтервал [start, end) на последовательные окна не длиннее chunk_days дней.
+    chunk_days: длина окна; по умолчанию - ограничение источника для интервала (PROVIDER_WINDOW_DAYS),
+    а для дневных и более длинных интервалов диапазон не разбивается.
+    Возвращает список пар (start, end) из pd.Timestamp.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    chunk_days = chunk_days or PROVIDER_WINDOW_DAYS.get(interval)
+    if chunk_days is None:
+        return [(start, end)]
+
+    step = pd.Timedelta(days=chunk_days)
+    windows = []
+    while start < end:
+        windows.append((start, min(start + step, end)))
+        start += step
+    return windows
+
+
+def _fetch_window(fetcher, ticker, window, interval, retries, backoff):
+    window_start, window_end = window
+    with stage('fetch_chunk', ticker=ticker) as current:
+        try:
+            data = fetch_with_retry(fetcher, ticker, retries=retries, backoff=backoff,
+                                    start=window_start.strftime('%Y-%m-%d'), end=window_end.strftime('%Y-%m-%d'),
+                                    interval=interval)
+        except NoDataError:
+            # Пустое окно (выходные, праздники) - не ошибка, а просто отсутствие баров
+            logging.debug(f"Нет данных для тикера {ticker} в окне {window_start.date()} - {window_end.date()}")
+            return None
+        # Источник может вернуть бары за пределами окна - оставляем только свои, чтобы окна не перекрывались
+        data = slice_date_range(data, window_start, window_end)
+        current.rows = len(data)
+    return data
+
+
+def iter_stock_data_chunks(ticker, period='1mo', start=None, end=None, interval='1m', chunk_days=None,
+                           max_workers=4, retries=3, backoff=1.0, fetcher=None):
+    """
+    Генератор: загружает историю тикера по окнам допустимой для источника длины и выдает ее порциями
+    (DataFrame) по возрастанию дат. Бары на границах окон, попавшие в соседние порции дважды, отбрасываются.
+    period, start, end, interval: параметры периода, как в fetch_stock_data.
+    chunk_days: длина окна в днях (по умолчанию - ограничение источника для интервала).
+    max_workers: число окон, загружаемых одновременно; оно же ограничивает число порций в памяти.
+    retries, backoff: повторные попытки, как в batch_download.fetch_with_retry.
+    fetcher: функция загрузки с сигнатурой fetcher(ticker, start=..., end=..., interval=...);
+    по умолчанию - data_download.download_history.
+    Если ни в одном окне нет данных, вызывается data_download.NoDataError.
+    """
+    if fetcher is None:
+        from data_download import download_history as fetcher
+
+    range_start, range_end = resolve_date_range(period, start, end)
+    windows = split_date_range(range_start, range_end, interval, chunk_days)
+    logging.info(f"Загрузка {ticker} ({interval}) частями: {len(windows)} окон")
+
+    last_timestamp = None
+    total_rows = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        next_window = 0
+        while pending or next_window < len(windows):
+            # Держим в работе не больше max_workers окон, чтобы не загружать всю историю наперед
+            while next_window < len(windows) and len(pending) < max_workers:
+                pending.append(executor.submit(_fetch_window, fetcher, ticker, windows[next_window], interval,
+                                               retries, backoff))
+                next_window += 1
+
+            data = pending.pop(0).result()
+            if data is None:
+                continue
+            data = data[~data.index.duplicated(keep='first')].sort_index()
+            if last_timestamp is not None:
+                data = data[data.index > last_timestamp]
+            if data.empty:
+                continue
+            last_timestamp = data.index[-1]
+            total_rows += len(data)
+            yield data
+
+    if total_rows == 0:
+        raise NoDataError(f"Данные для тикера {ticker} не найдены.")
+    logging.info(f"Загружено {total_rows} баров для {ticker}")
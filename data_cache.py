@@ -0,0 +1,243 @@
+# Данный модуль отвечает за локальное кэширование исторических данных об акциях.
+# Загруженные бары хранятся на диске в колоночном формате (по одному файлу на пару тикер/интервал),
+# а из сети догружаются только недостающие начало или конец запрошенного диапазона.
+
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data_download import NoDataError
+
+# Путь к папке для хранения кэша
+cache_dir = "cache"
+
+# Смещения для предустановленных периодов yfinance
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+# Самая ранняя дата, с которой запрашивается период 'max'
+EARLIEST_DATE = pd.Timestamp('1900-01-01')
+
+
+def resolve_date_range(period='1mo', start=None, end=None, today=None):
+    """
+    Переводит период или пару дат в полуинтервал [start, end) из дат без часового пояса.
+    period: предустановленный период ('1mo', '1y', 'ytd', 'max' и т.д.), используется, если не задан start.
+    start, end: даты в формате 'YYYY-MM-DD'; end не включается (как и в yfinance).
+    today: текущая дата (для воспроизводимости), по умолчанию - сегодняшний день.
+    """
+    today = pd.Timestamp(today if today is not None else pd.Timestamp.now()).normalize()
+    end_ts = pd.Timestamp(end).normalize() if end is not None else today + pd.Timedelta(days=1)
+
+    if start is not None:
+        start_ts = pd.Timestamp(start).normalize()
+    elif period == 'max':
+        start_ts = EARLIEST_DATE
+    elif period == 'ytd':
+        start_ts = pd.Timestamp(year=today.year, month=1, day=1)
+    elif period in PERIOD_OFFSETS:
+        start_ts = today - PERIOD_OFFSETS[period]
+    else:
+        raise ValueError(f"Неизвестный период: {period}")
+
+    if start_ts >= end_ts:
+        raise ValueError(f"Дата начала {start_ts.date()} должна быть раньше даты окончания {end_ts.date()}.")
+    return start_ts, end_ts
+
+
+def slice_date_range(data, start, end):
+    """
+    Возвращает строки DataFrame, попадающие в полуинтервал [start, end).
+    Даты сравниваются по местному времени биржи (часовой пояс индекса отбрасывается).
+    """
+    index = data.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    mask = (index >= start) & (index < end)
+    return data[mask]
+
+
+class StockDataCache:
+    """
+    Дисковый кэш OHLCV-данных с инкрементальной догрузкой диапазонов.
+    cache_dir: папка для хранения файлов кэша.
+    ttl: время жизни (в секундах) последнего, еще не закрытого бара; по его истечении хвост загружается заново.
+    offline: если True, данные отдаются только из кэша, сеть не используется.
+    fetcher: функция загрузки fetcher(ticker, start, end, interval), возвращающая DataFrame.
+    По умолчанию используется data_download.download_history; для тестов можно подставить локальный источник.
+    """
+
+    def __init__(self, cache_dir=cache_dir, ttl=15 * 60, offline=False, fetcher=None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.fetcher = fetcher
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._format = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'pickle'
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, ticker, period='1mo', start=None, end=None, interval='1d'):
+        """
+        Возвращает данные за запрошенный период, загружая из сети только отсутствующие в кэше бары.
+        Параметры совпадают с параметрами fetch_stock_data.
+        """
+        req_start, req_end = resolve_date_range(period, start, end)
+
+        with self._lock_for(ticker, interval):
+            cached, meta = self._load(ticker, interval)
+
+            if self.offline:
+                if cached is None:
+                    raise NoDataError(f"Нет данных в кэше для тикера {ticker} ({interval}), а офлайн-режим включен.")
+                logging.info(f"Данные для {ticker} взяты из кэша (офлайн-режим)")
+                return slice_date_range(cached, req_start, req_end)
+
+            for missing_start, missing_end in self._missing_ranges(cached, meta, req_start, req_end):
+                logging.info(f"Догружаем {ticker} ({interval}) за {missing_start.date()} - {missing_end.date()}")
+                fresh = self._fetch(ticker, missing_start, missing_end, interval)
+                empty = fresh is None or fresh.empty
+                if empty and cached is None:
+                    # Без уже сохраненных данных пустой ответ не считаем покрытием: диапазон будет запрошен снова,
+                    # а пустой DataFrame (с индексом не из дат и лишними столбцами) не становится основой кэша
+                    logging.info(f"Нет данных для {ticker} ({interval}) за {missing_start.date()} - "
+                                 f"{missing_end.date()}, диапазон не кэшируется")
+                    continue
+                # Пустой диапазон рядом с уже закэшированным (история тикера начинается позже, выходные)
+                # расширяет покрытие, чтобы не запрашивать его при каждом обращении
+                if not empty:
+                    cached = fresh if cached is None else _merge(cached, fresh)
+                meta = {
+                    'start': min(missing_start, _ts(meta, 'start', missing_start)).isoformat(),
+                    'end': max(missing_end, _ts(meta, 'end', missing_end)).isoformat(),
+                    'fetched_at': time.time() if missing_end >= _ts(meta, 'end', missing_end)
+                    else meta['fetched_at'],
+                }
+                self._save(ticker, interval, cached, meta)
+
+        if cached is None:
+            return pd.DataFrame()
+        return slice_date_range(cached, req_start, req_end)
+
+    def invalidate(self, ticker=None, interval=None):
+        """
+        Удаляет файлы кэша: для конкретного тикера и интервала, для всех интервалов тикера
+        или весь кэш целиком, если тикер не указан.
+        """
+        for name in os.listdir(self.cache_dir):
+            file_ticker, _, rest = name.rpartition('_')
+            file_interval = rest.split('.', 1)[0]
+            if ticker is not None and file_ticker != _safe_name(ticker):
+                continue
+            if interval is not None and file_interval != interval:
+                continue
+            os.remove(os.path.join(self.cache_dir, name))
+        logging.info(f"Кэш очищен: тикер={ticker or 'все'}, интервал={interval or 'все'}")
+
+    def _missing_ranges(self, cached, meta, req_start, req_end):
+        # Диапазон покрытия кэша всегда непрерывен: недостающее начало догружается вплоть до начала кэша,
+        # а недостающий конец - от конца кэша, поэтому "дыр" внутри покрытия не возникает
+        if cached is None:
+            return [(req_start, req_end)]
+
+        cov_start, cov_end = _ts(meta, 'start'), _ts(meta, 'end')
+        ranges = []
+        if req_start < cov_start:
+            ranges.append((req_start, cov_start))
+
+        today = pd.Timestamp.now().normalize()
+        if req_end > cov_end:
+            ranges.append((min(cov_end, _last_bar_day(cached, cov_end)), req_end))
+        elif cov_end > today and req_end > today and time.time() - meta['fetched_at'] > self.ttl:
+            # Последний бар еще не закрыт и устарел - перезагружаем хвост начиная с него
+            ranges.append((_last_bar_day(cached, today), cov_end))
+        return ranges
+
+    def _fetch(self, ticker, start, end, interval):
+        fetcher = self.fetcher
+        if fetcher is None:
+            from data_download import download_history
+            fetcher = download_history
+        return fetcher(ticker, start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'), interval=interval)
+
+    def _lock_for(self, ticker, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    def _paths(self, ticker, interval):
+        base = os.path.join(self.cache_dir, f"{_safe_name(ticker)}_{interval}")
+        extension = 'parquet' if self._format == 'parquet' else 'pkl'
+        return f"{base}.{extension}", f"{base}.json"
+
+    def _load(self, ticker, interval):
+        data_path, meta_path = self._paths(ticker, interval)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if self._format == 'parquet':
+                data = pd.read_parquet(data_path)
+            else:
+                data = pd.read_pickle(data_path)
+            if data.empty:
+                return None, None
+            return data, meta
+        except Exception as e:
+            logging.warning(f"Поврежденный файл кэша для {ticker} ({interval}) будет перезаписан: {e}")
+            return None, None
+
+    def _save(self, ticker, interval, data, meta):
+        data_path, meta_path = self._paths(ticker, interval)
+        # Сначала пишем во временные файлы, затем атомарно переименовываем,
+        # чтобы прерванная запись не оставила кэш в поврежденном состоянии
+        if self._format == 'parquet':
+            data.to_parquet(data_path + '.tmp')
+        else:
+            data.to_pickle(data_path + '.tmp')
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(data_path + '.tmp', data_path)
+        os.replace(meta_path + '.tmp', meta_path)
+
+
+def _merge(cached, fresh):
+    # Свежие бары имеют приоритет над закэшированными (например, перезагруженный незакрытый бар)
+    if fresh is None or fresh.empty:
+        return cached
+    combined = pd.concat([cached, fresh])
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def _ts(meta, key, default=None):
+    if meta is None:
+        return default
+    return pd.Timestamp(meta[key])
+
+
+def _last_bar_day(data, default):
+    if data.empty:
+        return default
+    last = data.index[-1]
+    if getattr(last, 'tzinfo', None) is not None:
+        last = last.tz_localize(None)
+    return last.normalize()
+
+
+def _safe_name(ticker):
+    return ticker.replace('/', '-').replace('\\', '-').replace('_', '-')
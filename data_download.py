@@ -1,15 +1,27 @@
 # Данный модуль отвечает за загрузку данных об акциях, он содержит функции для извлечения данных
 # об акциях из интернета и расчета скользящего среднего
 
-import yfinance as yf
 import logging
-from data_plotting import plot_rsi, plot_macd
+from instrumentation import instrument
 
-# Set up logging - добавляем логирование уровня INFO (выводим время логирования, уровень логирования, само сообщение)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class NoDataError(ValueError):
+    """
+    Данные для тикера не найдены (тикер не существует, за период нет баров или их нет в офлайн-кэше).
+    Повторять такой запрос бессмысленно, в отличие от временных ошибок сети и разбора ответа.
+    """
+
+
+def setup_logging(level=logging.INFO):
+    """
+    Настраивает логирование уровня INFO (выводим время логирования, уровень логирования, само сообщение).
+    Вызывается точками входа программы, а не при импорте модуля, чтобы импорт не имел побочных эффектов.
+    """
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def fetch_stock_data(ticker, period='1mo', start=None, end=None):
+@instrument(measure_bytes=True)
+def fetch_stock_data(ticker, period='1mo', start=None, end=None, interval='1d', cache=None):
     """
     Функция извлекает исторические данные о ценах акций.
     ticker: тикер акции, например, 'AAPL' для Apple.
@@ -17,14 +29,19 @@ def fetch_stock_data(ticker, period='1mo', start=None, end=None):
     data: исторические данные о цене акций за указанный период.
     start: дата начала в формате 'YYYY-MM-DD'.
     end: дата окончания в формате 'YYYY-MM-DD'.
+    interval: интервал баров, например, '1d' для дневных данных.
+    cache: экземпляр data_cache.StockDataCache; если указан, уже загруженные бары берутся с диска,
+    а из сети догружается только недостающая часть периода.
     """
 
     # Добавим исключение на тот случай, если мы запросили данные по несуществующему тикеру
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period, start=start, end=end)
+        if cache is not None:
+            data = cache.get(ticker, period=period, start=start, end=end, interval=interval)
+        else:
+            data = download_history(ticker, period=period, start=start, end=end, interval=interval)
         if data.empty:
-            raise ValueError(f"Данные для тикера {ticker} не найдены.")
+            raise NoDataError(f"Данные для тикера {ticker} не найдены.")
         logging.info("Данные успешно получены")
         return data
     except Exception as e:
@@ -32,6 +49,20 @@ def fetch_stock_data(ticker, period='1mo', start=None, end=None):
         raise
 
 
+@instrument(measure_bytes=True)
+def download_history(ticker, period=None, start=None, end=None, interval='1d'):
+    """
+    Загружает исторические данные о ценах акций из сети через yfinance (без кэширования и проверок).
+    Параметры совпадают с параметрами fetch_stock_data.
+    Библиотека yfinance импортируется при первой загрузке, чтобы не замедлять импорт модуля.
+    """
+    import yfinance as yf
+
+    stock = yf.Ticker(ticker)
+    return stock.history(period=period, start=start, end=end, interval=interval)
+
+
+@instrument()
 def calculate_and_display_average_price(data):
     """
     Вычисляет и выводит среднюю цену закрытия акций за период.
@@ -42,6 +73,7 @@ def calculate_and_display_average_price(data):
     print(f"Средняя цена закрытия акций за период: {average_price:.2f}")
 
 
+@instrument()
 def add_moving_average(data, window_size=5):
     """
     Добавляет столбец скользящего среднего к данным акций.
@@ -54,6 +86,7 @@ def add_moving_average(data, window_size=5):
     return data
 
 
+@instrument()
 def notify_if_strong_fluctuations(data, threshold):
     """
     Анализирует данные и уведомляет пользователя, если цена акций колебалась более чем на заданный процент за период.
@@ -72,14 +105,16 @@ def notify_if_strong_fluctuations(data, threshold):
         logging.info(f"Колебания в пределах нормы: {fluctuation:.2f}%")
 
 
+@instrument()
 def export_data_to_csv(data, filename):
     """
-    Экспортирует данные в CSV файл.
+    Экспортирует данные в CSV файл (вместе с индексом дат).
+    Для больших историй удобнее колоночные форматы из модуля data_export.
     :data: DataFrame с данными об акциях
     :filename: Имя файла для сохранения
     """
     try:
-        data.to_csv(filename, index=False)  # Сохраняем DataFrame в CSV файл без индексов
+        data.to_csv(filename)  # Сохраняем DataFrame в CSV файл вместе с индексом дат
         logging.info(f"Данные успешно сохранены в {filename}")
         print(f"Данные успешно сохранены в файл: {filename}")
     except Exception as e:
@@ -87,6 +122,7 @@ def export_data_to_csv(data, filename):
         print(f"Ошибка при сохранении данных: {e}")
 
 
+@instrument()
 def calculate_rsi(data, window=14):
     """
     Вычисляет RSI (индекс относительной силы) и добавляет его к данным акций.
@@ -108,6 +144,7 @@ def calculate_rsi(data, window=14):
     return data
 
 
+@instrument()
 def calculate_macd(data, short_window=12, long_window=26, signal_window=9):
     """
     Вычисляет MACD (схождение/расхождение скользящих средних) и добавляет его к данным акций.
@@ -123,6 +160,7 @@ def calculate_macd(data, short_window=12, long_window=26, signal_window=9):
     return data
 
 
+@instrument()
 def calculate_standard_deviation(data):
     """
     Вычисляет стандартное отклонение цены закрытия акций.
@@ -136,6 +174,10 @@ def calculate_standard_deviation(data):
 
 # Простое тестирование
 if __name__ == "__main__":
+    from data_plotting import plot_rsi, plot_macd
+    from indicator_pipeline import IndicatorPipeline
+
+    setup_logging()
     ticker = "AMZN"
     period = "6mo"
     threshold = 5  # Порог в процентах для уведомления
@@ -147,29 +189,25 @@ if __name__ == "__main__":
         # Выполняем расчет средней цены с выводом на консоль
         calculate_and_display_average_price(data)
 
-        # Добавляем скользящее среднее и выводим на консоль
-        data_with_ma = add_moving_average(data)
-        print(data_with_ma.head())
-
-        # Рассчитываем RSI
-        data_with_rsi = calculate_rsi(data_with_ma)
-        print(data_with_rsi[['Close', 'RSI']].head())
+        # Рассчитываем индикаторы одним конвейером, без промежуточных столбцов
+        indicators = IndicatorPipeline(['Moving_Average', 'RSI', 'MACD', 'Signal_Line']).compute(data)
+        data_with_indicators = data.join(indicators)
+        print(data_with_indicators[['Close', 'Moving_Average']].head())
+        print(data_with_indicators[['Close', 'RSI']].head())
 
         # Визуализация RSI
-        plot_rsi(data_with_rsi, ticker, period)
+        plot_rsi(data_with_indicators, ticker, period)
 
-        # Рассчитываем MACD
-        data_with_macd = calculate_macd(data_with_rsi)
-        print(data_with_macd[['Close', 'MACD', 'Signal_Line']].head())
+        print(data_with_indicators[['Close', 'MACD', 'Signal_Line']].head())
 
         # Визуализация MACD
-        plot_macd(data_with_macd, ticker, period)
+        plot_macd(data_with_indicators, ticker, period)
 
         # Проверяем на сильные колебания
         notify_if_strong_fluctuations(data, threshold)
 
         # Выполняем экспорт данных с добавленным скользящим средним в CSV
-        export_data_to_csv(data_with_ma, 'stock_data.csv')
+        export_data_to_csv(data_with_indicators[list(data.columns) + ['Moving_Average']], 'stock_data.csv')
 
     except Exception as e:
         print(f"Ошибка: {e}")
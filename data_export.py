@@ -0,0 +1,256 @@
+# Данный модуль отвечает за экспорт и загрузку данных об акциях с сохранением индекса дат.
+# Основные форматы - колоночные Parquet и Feather (Arrow IPC): данные хранятся в папке из файлов-частей
+# и файла-описания _manifest.json, поэтому новые бары дописываются отдельной частью без перезаписи
+# уже сохраненных. Загрузка читает только нужные столбцы и части, попадающие в диапазон дат,
+# а Feather-файлы отображаются в память. CSV поддерживается как запасной вариант (один файл с индексом).
+# Для колоночных форматов требуется библиотека pyarrow.
+
+import json
+import logging
+import os
+
+import pandas as pd
+
+FORMATS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather', '.csv': 'csv'}
+
+MANIFEST_NAME = '_manifest.json'
+
+
+def detect_format(path, format=None):
+    """
+    Определяет формат хранения по явному параметру или по расширению пути.
+    """
+    if format is not None:
+        if format not in FORMATS.values():
+            raise ValueError(f"Неподдерживаемый формат: {format}. Доступные: parquet, feather, csv")
+        return format
+    extension = os.path.splitext(path.rstrip('/\\'))[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Не удалось определить формат по имени {path}. Укажите расширение "
+                         f"{', '.join(FORMATS)} или параметр format.")
+    return FORMATS[extension]
+
+
+def export_data(data, path, format=None, row_group_size=65536):
+    """
+    Сохраняет DataFrame с индексом дат, заменяя ранее сохраненные данные.
+    data: DataFrame с DatetimeIndex.
+    path: путь к папке (для parquet/feather) или к файлу (для csv).
+    format: 'parquet', 'feather' или 'csv'; по умолчанию определяется по расширению path.
+    row_group_size: размер группы строк в Parquet (чем меньше, тем точнее чтение диапазона дат).
+    """
+    format = detect_format(path, format)
+    if format == 'csv':
+        _index_named(data).to_csv(path)
+    else:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith('part-') or name == MANIFEST_NAME:
+                os.remove(os.path.join(path, name))
+        manifest = {'format': format, 'index': _index_named(data).index.name,
+                    'columns': [str(column) for column in data.columns], 'parts': []}
+        _write_part(data, path, manifest, row_group_size)
+    logging.info(f"Данные ({len(data)} строк) сохранены в {path}")
+
+
+def append_data(data, path, format=None, row_group_size=65536):
+    """
+    Дописывает новые бары к ранее сохраненным данным без перезаписи существующих файлов.
+    Строки с датами не позже последней сохраненной даты отбрасываются, чтобы не возникало дублей.
+    Если данных по пути еще нет, работает как export_data.
+    Возвращает число дописанных строк.
+    """
+    format = detect_format(path, format)
+    if not os.path.exists(path):
+        export_data(data, path, format, row_group_size)
+        return len(data)
+
+    if format == 'csv':
+        last = _last_csv_timestamp(path)
+        new_rows = data[data.index > _as_index_time(last, data.index)] if last is not None else data
+        _index_named(new_rows).to_csv(path, mode='a', header=False)
+    else:
+        manifest = _read_manifest(path)
+        stored_columns = manifest['columns']
+        if [str(column) for column in data.columns] != stored_columns:
+            raise ValueError(f"Столбцы добавляемых данных не совпадают с сохраненными: {stored_columns}")
+        last = manifest['parts'][-1]['end'] if manifest['parts'] else None
+        new_rows = data[data.index > _as_index_time(last, data.index)] if last is not None else data
+        if not new_rows.empty:
+            _write_part(new_rows, path, manifest, row_group_size)
+
+    logging.info(f"Дописано {len(new_rows)} строк в {path}")
+    return len(new_rows)
+
+
+def load_data(path, columns=None, start=None, end=None, format=None, memory_map=True, chunksize=100000, tz=None):
+    """
+    Загружает сохраненные данные с индексом дат.
+    columns: список нужных столбцов (None - все).
+    start, end: границы диапазона дат включительно (строки 'YYYY-MM-DD' или Timestamp; None - без ограничения).
+    memory_map: отображать Feather-файлы в память вместо чтения целиком.
+    chunksize: размер порции при чтении CSV (файл читается по частям, в памяти остается только нужный диапазон).
+    tz: часовой пояс индекса для CSV (например, 'America/New_York'). CSV хранит только смещение от UTC,
+    поэтому без этого параметра даты с часовым поясом загружаются в UTC.
+    """
+    format = detect_format(path, format)
+    if format == 'csv':
+        return _load_csv(path, columns, start, end, chunksize, tz)
+
+    manifest = _read_manifest(path)
+    frames = []
+    for part in manifest['parts']:
+        # Пропускаем части, целиком лежащие вне запрошенного диапазона
+        if start is not None and pd.Timestamp(part['end']) < _as_part_time(start, part['end']):
+            continue
+        if end is not None and pd.Timestamp(part['start']) > _as_part_time(end, part['start']):
+            continue
+        part_path = os.path.join(path, part['file'])
+        if manifest['format'] == 'parquet':
+            frames.append(_read_parquet_part(part_path, manifest['index'], columns, start, end))
+        else:
+            frames.append(_read_feather_part(part_path, manifest['index'], columns, memory_map))
+
+    if not frames:
+        return pd.DataFrame(columns=columns or manifest['columns'])
+    data = pd.concat(frames) if len(frames) > 1 else frames[0]
+    return _slice(data, start, end)
+
+
+def _write_part(data, path, manifest, row_group_size):
+    import pyarrow as pa
+
+    number = len(manifest['parts'])
+    extension = 'parquet' if manifest['format'] == 'parquet' else 'feather'
+    filename = f"part-{number:05d}.{extension}"
+    table = pa.Table.from_pandas(_index_named(data), preserve_index=True)
+    if manifest['format'] == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, os.path.join(path, filename), row_group_size=row_group_size)
+    else:
+        # Без сжатия, чтобы файл можно было отобразить в память и читать без копирования
+        import pyarrow.feather as feather
+        feather.write_feather(table, os.path.join(path, filename), compression='uncompressed')
+
+    manifest['parts'].append({'file': filename, 'rows': len(data),
+                              'start': data.index[0].isoformat() if len(data) else None,
+                              'end': data.index[-1].isoformat() if len(data) else None})
+    manifest['parts'] = [part for part in manifest['parts'] if part['rows']]
+    with open(os.path.join(path, MANIFEST_NAME + '.tmp'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(path, MANIFEST_NAME + '.tmp'), os.path.join(path, MANIFEST_NAME))
+
+
+def _read_manifest(path):
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_parquet_part(part_path, index_name, columns, start, end):
+    import pyarrow.parquet as pq
+
+    # Фильтры по индексу позволяют пропускать группы строк вне диапазона дат
+    schema = pq.read_schema(part_path)
+    index_type = schema.field(index_name).type
+    filters = []
+    if start is not None:
+        filters.append((index_name, '>=', _arrow_time(start, index_type)))
+    if end is not None:
+        filters.append((index_name, '<=', _arrow_time(end, index_type)))
+    table = pq.read_table(part_path, columns=columns, filters=filters or None, use_pandas_metadata=True)
+    return table.to_pandas()
+
+
+def _read_feather_part(part_path, index_name, columns, memory_map):
+    import pyarrow.feather as feather
+
+    read_columns = None if columns is None else [index_name] + list(columns)
+    table = feather.read_table(part_path, columns=read_columns, memory_map=memory_map)
+    return table.to_pandas()
+
+
+def _load_csv(path, columns, start, end, chunksize, tz):
+    usecols = None if columns is None else [0] + _csv_column_positions(path, columns)
+    frames = []
+    for chunk in pd.read_csv(path, index_col=0, usecols=usecols, chunksize=chunksize):
+        chunk.index = _parse_csv_index(chunk.index, tz)
+        chunk = _slice(chunk, start, end)
+        if not chunk.empty:
+            frames.append(chunk)
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    data = pd.concat(frames)
+    return data if columns is None else data[list(columns)]
+
+
+def _csv_column_positions(path, columns):
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise KeyError(f"Столбцы {missing} отсутствуют в {path}")
+    return [header.index(column) for column in columns]
+
+
+def _parse_csv_index(index, tz=None):
+    # Даты с часовым поясом (как у yfinance) разбираем через UTC: смещение может меняться при переходе
+    # на летнее время, а затем переводим в часовой пояс tz, если он указан
+    text = index.astype(str)
+    if text.str.contains(r'[+-]\d{2}:\d{2}$', regex=True).any():
+        parsed = pd.DatetimeIndex(pd.to_datetime(text, utc=True), name=index.name)
+        return parsed.tz_convert(tz) if tz is not None else parsed
+    return pd.DatetimeIndex(pd.to_datetime(text), name=index.name)
+
+
+def _last_csv_timestamp(path):
+    # Читаем только конец файла, чтобы не разбирать его целиком
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = f.read().decode('utf-8').strip().splitlines()
+    if len(lines) < 2 and size <= 4096:
+        return None
+    return _parse_csv_index(pd.Index([lines[-1].split(',', 1)[0]]))[0]
+
+
+def _index_named(data):
+    if data.index.name is None:
+        return data.rename_axis('Date')
+    return data
+
+
+def _slice(data, start, end):
+    if start is not None:
+        data = data[data.index >= _as_index_time(start, data.index)]
+    if end is not None:
+        data = data[data.index <= _as_index_time(end, data.index)]
+    return data
+
+
+def _as_index_time(value, index):
+    # Приводит границу диапазона к часовому поясу индекса
+    value = pd.Timestamp(value)
+    tz = getattr(index, 'tz', None)
+    if tz is not None and value.tzinfo is None:
+        return value.tz_localize(tz)
+    if tz is None and value.tzinfo is not None:
+        return value.tz_localize(None)
+    if tz is not None:
+        return value.tz_convert(tz)
+    return value
+
+
+def _as_part_time(value, reference):
+    return _as_index_time(value, pd.DatetimeIndex([pd.Timestamp(reference)]))
+
+
+def _arrow_time(value, index_type):
+    import pyarrow as pa
+
+    tz = getattr(index_type, 'tz', None)
+    value = pd.Timestamp(value)
+    if tz is not None:
+        value = value.tz_localize(tz) if value.tzinfo is None else value.tz_convert(tz)
+    elif value.tzinfo is not None:
+        value = value.tz_localize(None)
+    return pa.scalar(value, type=index_type)
@@ -1,20 +1,311 @@
 """
 Данный модуль отвечает за визуализацию данных.
-Он содержит функции для создания и сохранения графиков цен закрытия и скользящих средних
+Он содержит функции для создания и сохранения графиков цен закрытия и скользящих средних.
+Библиотеки matplotlib, pandas и plotly импортируются при первом построении графика,
+поэтому импорт модуля не замедляет запуск программ и процессов, которые графики не строят.
+Построенные графики кэшируются по содержимому: если данные, параметры и стиль не изменились,
+а файл уже есть в папке images_dir, график не строится повторно.
 """
+import functools
+import hashlib
+import inspect
+import json
+import logging
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
-import plotly.graph_objs as go
+import sys
+import time
+
+from instrumentation import instrument
 
 # Путь к папке для сохранения изображений
 images_dir = "images"
 
-# Создаем папку, если она не существует
-os.makedirs(images_dir, exist_ok=True)
+# Фоновый режим: графики только сохраняются в файлы, окна не открываются (бэкенд Agg)
+headless = False
+
+# Бэкенд matplotlib, который использовался до включения фонового режима
+_interactive_backend = None
+
+# Кэш построенных графиков: повторное построение пропускается, если файл с тем же содержимым уже существует
+render_cache = True
+
+# Индекс кэша графиков - папка в images_dir с маленьким файлом на каждый график: запись <хэш имени>.json
+# (имя файла, ключ содержимого, вид, время создания, размер; время последнего использования - время изменения
+# записи) и обратная ссылка <ключ>.key с именем файла, под которым график с этим ключом уже сохранен.
+# Проверка и обновление кэша читают и пишут только файлы одного графика, а не весь индекс
+RENDER_CACHE_DIR = ".render_cache"
+
+# Версия формата графиков; при изменении оформления графиков ее нужно увеличить, чтобы кэш перестроился
+RENDER_CACHE_VERSION = 1
+
+def set_headless(enabled=True):
+    """
+    Включает или выключает фоновый режим построения графиков.
+    В фоновом режиме используется бэкенд Agg: графики только сохраняются в файлы,
+    окна не открываются и выполнение не блокируется (подходит для пакетной обработки и серверов).
+    """
+    global headless, _interactive_backend
+    if enabled == headless:
+        return
+    headless = enabled
+    # Если pyplot еще не импортирован, бэкенд будет выбран при первом построении графика (см. load_pyplot)
+    plt = sys.modules.get('matplotlib.pyplot')
+    if plt is None:
+        return
+    if enabled:
+        _interactive_backend = plt.get_backend()
+        plt.switch_backend('Agg')
+    else:
+        # Возвращаем бэкенд, который был до включения фонового режима (или выбираемый matplotlib по умолчанию)
+        import matplotlib
+
+        plt.switch_backend(_interactive_backend or matplotlib.rcParamsOrig['backend'])
+        _interactive_backend = None
 
 
-def plot_rsi(data, ticker, period, filename=None, style='default'):
+def load_pyplot():
+    """
+    Импортирует matplotlib.pyplot при первом использовании; в фоновом режиме предварительно выбирается бэкенд Agg.
+    """
+    if headless and 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def image_path(filename):
+    """
+    Возвращает путь к файлу графика в папке images_dir, создавая папку, если она не существует.
+    """
+    os.makedirs(images_dir, exist_ok=True)
+    return os.path.join(images_dir, filename)
+
+
+def _show_and_close(fig, show):
+    """
+    Отображает график на экране (если это не фоновый режим) и закрывает фигуру.
+    show: None - отображать, если фоновый режим выключен; True/False - отображать или нет принудительно.
+    """
+    plt = load_pyplot()
+    if show is None:
+        show = not headless
+    if show:
+        print("Закройте график для продолжения...")
+        plt.show()
+    plt.close(fig)
+
+
+def canonical_period(period):
+    """
+    Приводит подпись периода к каноническому виду: 'X to X' -> 'X' (например, '1mo to 1mo' -> '1mo'),
+    чтобы один и тот же график не сохранялся под разными именами.
+    """
+    period = str(period).strip()
+    parts = period.split(' to ')
+    if len(parts) == 2 and parts[0].strip() == parts[1].strip():
+        return parts[0].strip()
+    return period
+
+
+def chart_filename(ticker, period, suffix):
+    """
+    Имя файла графика по умолчанию: тикер, канонический период и суффикс, например, 'AAPL_1mo_rsi_chart.png'.
+    Пробелы заменяются подчеркиваниями: 'AAPL_2024-10-20_to_2024-10-28_rsi_chart.png'.
+    """
+    return f"{ticker}_{canonical_period(period)}_{suffix}".replace(' ', '_')
+
+
+def set_render_cache(enabled=True):
+    """
+    Включает или выключает кэш построенных графиков.
+    """
+    global render_cache
+    render_cache = enabled
+
+
+def _cache_path(name):
+    return os.path.join(images_dir, RENDER_CACHE_DIR, name)
+
+
+def _entry_path(filename):
+    return _cache_path(hashlib.sha1(filename.encode('utf-8')).hexdigest() + '.json')
+
+
+def _read_entry(filename):
+    try:
+        with open(_entry_path(filename), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, text):
+    # Запись во временный файл и атомарная замена: графики могут строиться в нескольких процессах одновременно
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def _remove_entry(filename, entry):
+    for path in (_entry_path(filename), _cache_path(entry['key'] + '.key')):
+        try:
+            if path.endswith('.key'):
+                with open(path, encoding='utf-8') as f:
+                    if f.read() != filename:
+                        continue
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_render_manifest():
+    """
+    Собирает индекс кэша графиков: словарь имя файла -> запись (ключ, вид, время создания и использования, размер).
+    Читает записи всех графиков, поэтому предназначена для обслуживания кэша, а не для построения.
+    """
+    manifest = {}
+    try:
+        items = list(os.scandir(_cache_path('')))
+    except OSError:
+        return manifest
+    for item in items:
+        if not item.name.endswith('.json'):
+            continue
+        try:
+            with open(item.path, encoding='utf-8') as f:
+                entry = json.load(f)
+            entry['last_used'] = item.stat().st_mtime
+        except (OSError, ValueError):
+            continue
+        manifest[entry['filename']] = entry
+    return manifest
+
+
+def render_key(kind, data, ticker, period, params):
+    """
+    Ключ содержимого графика: хэш входных рядов (значения и индекс), вида графика, тикера,
+    канонического периода и параметров построения (включая стиль).
+    """
+    import pandas as pd
+
+    digest = hashlib.sha256()
+    header = {'version': RENDER_CACHE_VERSION, 'kind': kind, 'ticker': ticker, 'period': canonical_period(period),
+              'params': params, 'columns': list(map(str, data.columns))}
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cached_render(kind, columns, suffix=None):
+    """
+    Декоратор функции построения графика с сигнатурой (data, ticker, period, ..., filename=None, show=None).
+    Если график не нужно показывать на экране, а файл с тем же ключом содержимого уже есть в индексе кэша,
+    построение пропускается и возвращается путь к существующему файлу. Если тот же график сохранен под другим
+    именем, файл копируется. Иначе график строится, а запись о нем добавляется в индекс.
+    columns: столбцы data, которые использует график; suffix: суффикс имени файла по умолчанию
+    (None - без имени файла по умолчанию, график в файл не сохраняется).
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(data, ticker, period, *args, **kwargs):
+            arguments = signature.bind(data, ticker, period, *args, **kwargs)
+            arguments.apply_defaults()
+            params = dict(arguments.arguments)
+            filename = params.pop('filename')
+            show = params.pop('show')
+            for name in ('data', 'ticker', 'period'):
+                params.pop(name)
+
+            if filename is None and suffix is not None:
+                filename = arguments.arguments['filename'] = chart_filename(ticker, period, suffix)
+            if show is None:
+                show = not headless and (suffix is not None or filename is None)
+            if not render_cache or filename is None or show:
+                return func(*arguments.args, **arguments.kwargs)
+
+            key = render_key(kind, data[[column for column in columns if column in data.columns]], ticker, period,
+                             params)
+            filepath = os.path.join(images_dir, filename)
+            entry = _read_entry(filename)
+            if entry is not None and entry['key'] == key and os.path.exists(filepath):
+                logging.info(f"График {filename} не изменился, повторное построение пропущено")
+                # Время последнего использования - время изменения записи, поэтому запись не переписываем
+                os.utime(_entry_path(filename))
+                return filepath
+
+            try:
+                with open(_cache_path(key + '.key'), encoding='utf-8') as f:
+                    source = f.read()
+            except OSError:
+                source = None
+            source_path = os.path.join(images_dir, source) if source else None
+            if (source not in (None, filename) and os.path.exists(source_path)
+                    and (_read_entry(source) or {}).get('key') == key):
+                import shutil
+
+                shutil.copyfile(source_path, filepath)
+                logging.info(f"График {filename} скопирован из {source} без повторного построения")
+            else:
+                filepath = func(*arguments.args, **arguments.kwargs)
+
+            os.makedirs(_cache_path(''), exist_ok=True)
+            _write_atomic(_entry_path(filename), json.dumps(
+                {'filename': filename, 'key': key, 'kind': kind, 'created': time.time(),
+                 'size': os.path.getsize(filepath)}, ensure_ascii=False))
+            _write_atomic(_cache_path(key + '.key'), filename)
+            return filepath
+
+        return wrapper
+
+    return decorator
+
+
+def evict_render_cache(max_bytes=None, max_age_days=None):
+    """
+    Удаляет графики из кэша: сначала те, что не использовались дольше max_age_days дней,
+    затем давно не использованные, пока суммарный объем не станет не больше max_bytes.
+    Записи о файлах, удаленных вручную, убираются из индекса. Файлы, которых нет в индексе, не затрагиваются.
+    Возвращает список удаленных файлов.
+    """
+    manifest = load_render_manifest()
+    entries = sorted((entry['last_used'], filename, entry['size']) for filename, entry in manifest.items()
+                     if os.path.exists(os.path.join(images_dir, filename)))
+    # Записи о файлах, удаленных вручную, убираем сразу
+    for filename, entry in manifest.items():
+        if not os.path.exists(os.path.join(images_dir, filename)):
+            _remove_entry(filename, entry)
+
+    evicted = set()
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        evicted.update(filename for last_used, filename, _ in entries if last_used < cutoff)
+    if max_bytes is not None:
+        total = sum(size for _, filename, size in entries if filename not in evicted)
+        for _, filename, size in entries:
+            if total <= max_bytes:
+                break
+            if filename not in evicted:
+                evicted.add(filename)
+                total -= size
+
+    evicted = [filename for _, filename, _ in entries if filename in evicted]
+    for filename in evicted:
+        try:
+            os.remove(os.path.join(images_dir, filename))
+        except FileNotFoundError:
+            pass
+        _remove_entry(filename, manifest[filename])
+    logging.info(f"Из кэша графиков удалено файлов: {len(evicted)}")
+    return evicted
+
+
+@instrument()
+@cached_render('rsi', ['RSI'], 'rsi_chart.png')
+def plot_rsi(data, ticker, period, filename=None, style='default', show=None):
     """
     Функция для построения графика RSI (индекс относительной силы):
     plt.figure: устанавливает размер графика;
@@ -26,82 +317,93 @@ def plot_rsi(data, ticker, period, filename=None, style='default'):
 
     Визуализация графика:
     plt.savefig: сохранение графика в файл
-    plt.show: отображение графика на экране
-    """
-    plt.style.use(style)
-    plt.figure(figsize=(10, 4))
-    plt.plot(data.index, data['RSI'], label='RSI', color='purple')
-    plt.axhline(70, linestyle='--', alpha=0.5, color='red')
-    plt.axhline(30, linestyle='--', alpha=0.5, color='green')
-    plt.title(f"{ticker} RSI ({period})")
-    plt.xlabel("Дата")
-    plt.ylabel("RSI")
-    plt.legend()
-
-    if filename is None:
-        # Присваиваем имя файла по умолчанию
-        filename = f"{ticker}_{period}_rsi_chart.png"
-
-    # Объединяем путь к папке и имя файла
-    filepath = os.path.join(images_dir, filename)
-
-    plt.savefig(filepath)
+    plt.show: отображение графика на экране (не вызывается в фоновом режиме или при show=False)
+    plt.close: закрытие фигуры, чтобы при пакетной обработке не накапливалась память.
+    Функция возвращает путь к сохраненному файлу.
+    """
+    plt = load_pyplot()
+    with plt.style.context(style):
+        fig = plt.figure(figsize=(10, 4))
+        plt.plot(data.index, data['RSI'], label='RSI', color='purple')
+        plt.axhline(70, linestyle='--', alpha=0.5, color='red')
+        plt.axhline(30, linestyle='--', alpha=0.5, color='green')
+        plt.title(f"{ticker} RSI ({period})")
+        plt.xlabel("Дата")
+        plt.ylabel("RSI")
+        plt.legend()
+
+        if filename is None:
+            # Присваиваем имя файла по умолчанию
+            filename = chart_filename(ticker, period, 'rsi_chart.png')
+
+        # Объединяем путь к папке и имя файла
+        filepath = image_path(filename)
+
+        plt.savefig(filepath)
     print(f"График RSI сохранен как {filename}")
-    print("Закройте график для продолжения...")
-    plt.show()
+    _show_and_close(fig, show)
+    return filepath
 
 
-def plot_macd(data, ticker, period, filename=None, style='default'):
+@instrument()
+@cached_render('macd', ['MACD', 'Signal_Line'], 'macd_chart.png')
+def plot_macd(data, ticker, period, filename=None, style='default', show=None):
     """
     Функция для построения графика MACD (схождения и расхождения скользящих средних).
     Описание аналогично функции для построения графика RSI.
     Отличие состоит в том, что строится одна сигнальная линия, а не две (как было в RSI).
     """
-    plt.style.use(style)
-    plt.figure(figsize=(10, 6))
-    plt.plot(data.index, data['MACD'], label='MACD', color='blue')
-    plt.plot(data.index, data['Signal_Line'], label='Signal Line', color='orange')
-    plt.title(f"{ticker} MACD ({period})")
-    plt.xlabel("Дата")
-    plt.ylabel("MACD")
-    plt.legend()
+    plt = load_pyplot()
+    with plt.style.context(style):
+        fig = plt.figure(figsize=(10, 6))
+        plt.plot(data.index, data['MACD'], label='MACD', color='blue')
+        plt.plot(data.index, data['Signal_Line'], label='Signal Line', color='orange')
+        plt.title(f"{ticker} MACD ({period})")
+        plt.xlabel("Дата")
+        plt.ylabel("MACD")
+        plt.legend()
 
-    if filename is None:
-        filename = f"{ticker}_{period}_macd_chart.png"
+        if filename is None:
+            filename = chart_filename(ticker, period, 'macd_chart.png')
 
-    filepath = os.path.join(images_dir, filename)
+        filepath = image_path(filename)
 
-    plt.savefig(filepath)
+        plt.savefig(filepath)
     print(f"График MACD сохранен как {filename}")
-    print("Закройте график для продолжения...")
-    plt.show()
+    _show_and_close(fig, show)
+    return filepath
 
 
-def plot_standard_deviation(data, ticker, period, std_dev, filename=None, style='default'):
+@instrument()
+@cached_render('std_dev', ['Close'], 'std_dev_chart.png')
+def plot_standard_deviation(data, ticker, period, std_dev, filename=None, style='default', show=None):
     """
     Функция для построения графика стандартного отклонения:
     """
-    plt.style.use(style)
-    plt.figure(figsize=(10, 6))
-    plt.plot(data.index, data['Close'], label='Close Price')
-    plt.axhline(std_dev, color='red', linestyle='--', label=f'Standard Deviation: {std_dev:.2f}')
-    plt.title(f"{ticker} Цена акций и стандартное отклонение ({period})")
-    plt.xlabel("Дата")
-    plt.ylabel("Цена")
-    plt.legend()
+    plt = load_pyplot()
+    with plt.style.context(style):
+        fig = plt.figure(figsize=(10, 6))
+        plt.plot(data.index, data['Close'], label='Close Price')
+        plt.axhline(std_dev, color='red', linestyle='--', label=f'Standard Deviation: {std_dev:.2f}')
+        plt.title(f"{ticker} Цена акций и стандартное отклонение ({period})")
+        plt.xlabel("Дата")
+        plt.ylabel("Цена")
+        plt.legend()
 
-    if filename is None:
-        filename = f"{ticker}_{period}_std_dev_chart.png"
+        if filename is None:
+            filename = chart_filename(ticker, period, 'std_dev_chart.png')
 
-    filepath = os.path.join(images_dir, filename)
+        filepath = image_path(filename)
 
-    plt.savefig(filepath)
+        plt.savefig(filepath)
     print(f"График стандартного отклонения сохранен как {filename}")
-    print("Закройте график для продолжения...")
-    plt.show()
+    _show_and_close(fig, show)
+    return filepath
 
 
-def create_and_save_plot(data, ticker, period, filename=None, style='default'):
+@instrument()
+@cached_render('price', ['Close', 'Moving_Average'], 'stock_price_chart.png')
+def create_and_save_plot(data, ticker, period, filename=None, style='default', show=None):
     """
     Функция для создания и сохранения графика цен акций и скользящей средней:
     dates: преобразовывает даты в массив numpy;
@@ -110,30 +412,145 @@ def create_and_save_plot(data, ticker, period, filename=None, style='default'):
     будет использоваться стиль по умолчанию...
     Все остальное реализовано по аналогии с двумя предыдущими функциями.
     """
-    plt.style.use(style)
-    plt.figure(figsize=(10, 6))
+    import pandas as pd
 
-    if pd.api.types.is_datetime64_any_dtype(data.index):
-        dates = data.index.to_numpy()
-        plt.plot(dates, data['Close'].values, label='Close Price')
-        plt.plot(dates, data['Moving_Average'].values, label='Moving Average')
+    plt = load_pyplot()
+    with plt.style.context(style):
+        fig = plt.figure(figsize=(10, 6))
 
-    plt.title(f"{ticker} Цена акций с течением времени")
-    plt.xlabel("Дата")
-    plt.ylabel("Цена")
-    plt.legend()
+        if pd.api.types.is_datetime64_any_dtype(data.index):
+            dates = data.index.to_numpy()
+            plt.plot(dates, data['Close'].values, label='Close Price')
+            plt.plot(dates, data['Moving_Average'].values, label='Moving Average')
 
-    if filename is None:
-        filename = f"{ticker}_{period}_stock_price_chart.png"
-    filepath = os.path.join(images_dir, filename)
+        plt.title(f"{ticker} Цена акций с течением времени")
+        plt.xlabel("Дата")
+        plt.ylabel("Цена")
+        plt.legend()
 
-    plt.savefig(filepath)
+        if filename is None:
+            filename = chart_filename(ticker, period, 'stock_price_chart.png')
+        filepath = image_path(filename)
+
+        plt.savefig(filepath)
     print(f"График сохранен как {filename}")
-    print("Закройте график для продолжения...")
-    plt.show()
+    _show_and_close(fig, show)
+    return filepath
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Прореживание ряда алгоритмом LTTB (Largest-Triangle-Three-Buckets): ряд делится на n_out - 2 корзины,
+    и из каждой выбирается точка, образующая треугольник наибольшей площади с соседями.
+    В отличие от простого прореживания, сохраняет форму графика: пики и провалы не теряются.
+    x, y: массивы NumPy одинаковой длины без пропусков; x - по возрастанию.
+    Возвращает индексы выбранных точек (первая и последняя точки всегда сохраняются).
+    """
+    import numpy as np
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    selected = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Средняя точка следующей корзины (для последней корзины - последняя точка ряда)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def downsample_series(series, n_out):
+    """
+    Прореживает Series с индексом дат до n_out точек алгоритмом LTTB, пропуская NaN (например,
+    начало скользящего среднего). Возвращает прореженный Series.
+    """
+    import pandas as pd
+
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+    if isinstance(series.index, pd.DatetimeIndex):
+        x = series.index.asi8
+    else:
+        x = series.index.to_numpy(dtype=float)
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), n_out)]
+
+
+def _plotly_x(index):
+    # Даты передаем строками местного времени биржи: так их показывает plotly.js,
+    # и так их удобно сравнивать с границами масштабирования в браузере
+    if hasattr(index, 'strftime'):
+        return list(index.strftime('%Y-%m-%d %H:%M:%S'))
+    return index.tolist()
+
+
+# Скрипт для HTML-файла: при масштабировании по оси X подставляет точки из более подробного уровня
+ZOOM_DETAIL_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var detail = %(detail)s;
+var maxPoints = %(max_points)d;
+var overview = gd.data.map(function (trace) { return {x: trace.x, y: trace.y}; });
+gd.on('plotly_relayout', function (event) {
+    var x0 = event['xaxis.range[0]'], x1 = event['xaxis.range[1]'];
+    if (event['xaxis.range']) { x0 = event['xaxis.range'][0]; x1 = event['xaxis.range'][1]; }
+    if (x0 === undefined && !event['xaxis.autorange']) { return; }
+    var xs = [], ys = [];
+    for (var i = 0; i < detail.length; i++) {
+        if (x0 === undefined) { xs.push(overview[i].x); ys.push(overview[i].y); continue; }
+        var px = [], py = [];
+        for (var j = 0; j < detail[i].x.length; j++) {
+            if (detail[i].x[j] >= x0 && detail[i].x[j] <= x1) { px.push(detail[i].x[j]); py.push(detail[i].y[j]); }
+        }
+        var step = Math.max(1, Math.ceil(px.length / maxPoints));
+        xs.push(px.filter(function (_, k) { return k %% step === 0; }));
+        ys.push(py.filter(function (_, k) { return k %% step === 0; }));
+    }
+    Plotly.restyle(gd, {x: xs, y: ys});
+});
+"""
+
+
+def _build_interactive_figure(data, ticker, period, max_points, webgl_threshold):
+    import plotly.graph_objs as go
+
+    columns = [('Close', 'Close Price')]
+    if 'Moving_Average' in data.columns:
+        columns.append(('Moving_Average', 'Moving Average'))
+
+    fig = go.Figure()
+    for column, name in columns:
+        series = data[column] if max_points is None else downsample_series(data[column], max_points)
+        # Для длинных рядов используем WebGL (Scattergl): браузер отрисовывает их значительно быстрее
+        trace = go.Scattergl if len(series) > webgl_threshold else go.Scatter
+        fig.add_trace(trace(x=_plotly_x(series.index), y=series.to_numpy(), mode='lines', name=name))
+
+    fig.update_layout(title=f"{ticker} Цена акций ({period})",
+                      xaxis_title='Дата',
+                      yaxis_title='Цена',
+                      legend_title='Легенда',
+                      hovermode='x unified')
+    return fig, [column for column, _ in columns]
 
 
-def plot_interactive_stock_data(data, ticker, period):
+@instrument()
+@cached_render('html', ['Close', 'Moving_Average'])
+def plot_interactive_stock_data(data, ticker, period, max_points=None, filename=None, show=None,
+                                size_budget=None, zoom_detail=False, include_plotlyjs=True, webgl_threshold=1000):
     """
     Функция для построения интерактивного графика цен акций с использованием Plotly.
     data: DataFrame с данными о ценах акций.
@@ -143,17 +560,143 @@ def plot_interactive_stock_data(data, ticker, period):
     fig.update_layout: настройки графика
     fig.show: отображение интерактивного графика
 
+    Для длинных историй:
+    max_points: прореживание каждой линии до max_points точек алгоритмом LTTB с сохранением формы (None - без прореживания);
+    webgl_threshold: начиная с какого числа точек линия рисуется через WebGL (Scattergl);
+    filename: сохранение графика в HTML-файл в папке images_dir вместо открытия браузера;
+    include_plotlyjs: True - библиотека plotly.js встраивается в файл (полностью автономная страница, около 3,5 МБ),
+    'directory' - plotly.min.js один раз сохраняется рядом с файлами (удобно для сотен страниц), 'cdn' - загрузка из сети;
+    size_budget: ограничение объема данных графика в HTML-файле в байтах (без учета plotly.js);
+    при превышении число точек уменьшается вдвое, пока данные не уложатся в ограничение;
+    zoom_detail: встроить более подробный уровень данных (в 10 раз больше точек), который подставляется при масштабировании.
+    show: None - открыть график в браузере, только если он не сохраняется в файл и не включен фоновый режим.
+    Функция возвращает путь к HTML-файлу (или None, если файл не сохранялся).
     """
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index, y=data['Close'], mode='lines', name='Close Price'))
+    import json
 
-    if 'Moving_Average' in data.columns:
-        fig.add_trace(go.Scatter(x=data.index, y=data['Moving_Average'], mode='lines', name='Moving Average'))
+    if max_points is None and size_budget is not None:
+        max_points = len(data)
 
-    fig.update_layout(title=f"{ticker} Цена акций ({period})",
-                      xaxis_title='Дата',
-                      yaxis_title='Цена',
-                      legend_title='Легенда',
-                      hovermode='x unified')
+    while True:
+        fig, columns = _build_interactive_figure(data, ticker, period, max_points, webgl_threshold)
+        post_script = None
+        if zoom_detail and max_points is not None:
+            detail = []
+            for column in columns:
+                series = downsample_series(data[column], max_points * 10)
+                detail.append({'x': _plotly_x(series.index), 'y': series.round(6).tolist()})
+            post_script = ZOOM_DETAIL_SCRIPT % {'detail': json.dumps(detail), 'max_points': max_points}
+
+        if filename is None or size_budget is None:
+            break
+        payload = len(fig.to_html(include_plotlyjs=False, post_script=post_script).encode('utf-8'))
+        if payload <= size_budget or max_points <= 100:
+            if payload > size_budget:
+                logging.warning(f"График {ticker} не укладывается в ограничение {size_budget} байт: {payload} байт")
+            break
+        max_points //= 2
+
+    filepath = None
+    if filename is not None:
+        filepath = image_path(filename)
+        fig.write_html(filepath, include_plotlyjs=include_plotlyjs, post_script=post_script)
+        print(f"Интерактивный график сохранен как {filename}")
+
+    if show is None:
+        show = filename is None and not headless
+    if show:
+        fig.show()
+    return filepath
+
+
+# Функции построения графиков для пакетного режима и столбцы данных, которые им нужны
+CHART_FUNCTIONS = {
+    'price': (create_and_save_plot, ['Close', 'Moving_Average']),
+    'std_dev': (plot_standard_deviation, ['Close']),
+    'rsi': (plot_rsi, ['RSI']),
+    'macd': (plot_macd, ['MACD', 'Signal_Line']),
+    'html': (plot_interactive_stock_data, ['Close']),
+}
+
+# Столбцы, которые график использует, только если они есть в данных
+OPTIONAL_CHART_COLUMNS = {
+    'html': ['Moving_Average'],
+}
+
+
+def chart_columns(kind, data):
+    """
+    Столбцы data, которые нужно передать функции построения графика вида kind:
+    обязательные столбцы из CHART_FUNCTIONS и имеющиеся в данных необязательные.
+    """
+    optional = [column for column in OPTIONAL_CHART_COLUMNS.get(kind, []) if column in data.columns]
+    return CHART_FUNCTIONS[kind][1] + optional
+
+
+def render_chart(job):
+    """
+    Строит один график пакетного задания (выполняется в рабочем процессе).
+    """
+    func, _ = CHART_FUNCTIONS[job['kind']]
+    params = {key: value for key, value in job.items() if key not in ('kind', 'data', 'ticker', 'period')}
+    return func(job['data'], job['ticker'], job['period'], show=False, **params)
+
+
+def process_pool_context():
+    """
+    Контекст multiprocessing для пулов процессов построения графиков: forkserver, а где его нет - spawn.
+    Процессы не создаются через fork: если в программе уже работают потоки (например, загрузки),
+    скопированная в дочерний процесс захваченная блокировка (например, логирования) привела бы к зависанию.
+    """
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def render_charts(jobs, max_workers=None):
+    """
+    Строит пакет графиков в фоновом режиме, распределяя их по пулу процессов.
+    jobs: список словарей с ключами 'kind' ('price', 'std_dev', 'rsi', 'macd' или 'html'), 'data', 'ticker', 'period'
+    и необязательными параметрами функции построения ('filename', 'style', а для 'std_dev' - обязательный 'std_dev').
+    max_workers: число процессов; при значении 1 графики строятся в текущем процессе.
+    Возвращает список той же длины, что и jobs: путь к сохраненному файлу либо исключение, если график построить не удалось.
+    """
+    # В рабочие процессы передаем только нужные графику столбцы, чтобы не копировать весь DataFrame.
+    # Ошибка подготовки (например, нет нужного столбца) относится только к своему заданию
+    results = [None] * len(jobs)
+    prepared = []
+    for number, job in enumerate(jobs):
+        try:
+            columns = chart_columns(job['kind'], job['data'])
+            prepared.append((number, {**job, 'data': job['data'][columns]}))
+        except Exception as e:
+            results[number] = e
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    if max_workers == 1:
+        # Фоновый режим включаем только на время построения, чтобы не изменить поведение вызывающей программы
+        previous = headless
+        set_headless()
+        try:
+            for number, job in prepared:
+                try:
+                    results[number] = render_chart(job)
+                except Exception as e:
+                    results[number] = e
+        finally:
+            set_headless(previous)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=process_pool_context(),
+                                 initializer=set_headless) as executor:
+            futures = [(number, executor.submit(render_chart, job)) for number, job in prepared]
+            for number, future in futures:
+                try:
+                    results[number] = future.result()
+                except Exception as e:
+                    results[number] = e
 
-    fig.show()
+    failed = sum(isinstance(result, Exception) for result in results)
+    logging.info(f"Пакетное построение графиков завершено: успешно {len(results) - failed}, с ошибками {failed}")
+    return results
@@ -0,0 +1,165 @@
+# Данный модуль отвечает за поиск сильных колебаний цены внутри периода сразу по множеству тикеров.
+# В отличие от notify_if_strong_fluctuations, который считает одно колебание (max - min) / min за весь период,
+# здесь колебание считается в скользящих окнах заданной длины, а результат - структурированные события,
+# а не сообщения на консоль. Поддерживаются пакетный режим (матрица дата x тикер) и поток баров.
+
+import logging
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+from panel_indicators import pack_columns, unpack_columns
+
+# Событие о сильном колебании: тикер, длина окна (в барах), время бара, величина колебания в процентах и порог
+FluctuationAlert = namedtuple('FluctuationAlert', ['ticker', 'window', 'timestamp', 'magnitude', 'threshold'])
+
+
+def _threshold_for(thresholds, window):
+    if isinstance(thresholds, dict):
+        return thresholds[window]
+    return thresholds
+
+
+def _packed_range_percent(packed, window):
+    rolling = pd.DataFrame(packed).rolling(window, min_periods=window)
+    highs = rolling.max().to_numpy()
+    lows = rolling.min().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (highs - lows) / lows * 100
+
+
+def rolling_range_percent(closes, window):
+    """
+    Колебание цены (max - min) / min * 100 в скользящем окне из window баров для каждого тикера.
+    closes: DataFrame дата x тикер с ценами закрытия.
+    Окно отсчитывается по торговым дням каждого тикера (пропуски в истории не разрывают окно).
+    Скользящие максимум и минимум считаются за O(n) на тикер (алгоритм с монотонной очередью в pandas).
+    """
+    values = closes.to_numpy(dtype=float)
+    packed, order = pack_columns(values)
+    percent = _packed_range_percent(packed, window)
+    return pd.DataFrame(unpack_columns(percent, order, ~np.isnan(values)), index=closes.index,
+                        columns=closes.columns)
+
+
+@instrument()
+def scan_fluctuations(closes, windows=(5, 20), thresholds=5.0, edge_only=True):
+    """
+    Ищет сильные колебания цены во всех тикерах панели.
+    closes: DataFrame дата x тикер с ценами закрытия (например, panel_indicators.close_panel).
+    windows: длины окон в барах.
+    thresholds: порог в процентах - одно число для всех окон или словарь окно -> порог.
+    edge_only: если True, событие создается только в момент превышения порога (а не на каждом баре,
+    пока колебание остается выше порога).
+    Возвращает список FluctuationAlert, упорядоченный по времени.
+    """
+    packed, order = pack_columns(closes.to_numpy(dtype=float))
+
+    alerts = []
+    for window in windows:
+        threshold = _threshold_for(thresholds, window)
+        percent = _packed_range_percent(packed, window)
+        exceeded = percent > threshold
+        if edge_only:
+            # Сравниваем с предыдущим баром того же тикера (в упакованной матрице это предыдущая строка)
+            exceeded[1:] &= ~exceeded[:-1]
+        # Переводим позиции из упакованной матрицы обратно в исходные даты
+        packed_rows, cols = np.nonzero(exceeded)
+        rows = order[packed_rows, cols]
+        timestamps = closes.index[rows]
+        tickers = closes.columns[cols]
+        magnitudes = percent[packed_rows, cols]
+        alerts.extend(FluctuationAlert(ticker, window, timestamp, float(magnitude), threshold)
+                      for ticker, timestamp, magnitude in zip(tickers, timestamps, magnitudes))
+
+    alerts.sort(key=lambda alert: alert.timestamp)
+    logging.info(f"Найдено событий о сильных колебаниях: {len(alerts)}")
+    return alerts
+
+
+def alerts_to_frame(alerts):
+    """
+    Преобразует список событий в DataFrame (например, для экспорта или группировки по тикерам).
+    """
+    return pd.DataFrame(alerts, columns=FluctuationAlert._fields)
+
+
+class RollingRange:
+    """
+    Скользящие максимум и минимум в окне из window последних значений на монотонных очередях:
+    каждое обновление выполняется за амортизированное O(1).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.highs = deque()
+        self.lows = deque()
+
+    def update(self, value):
+        """
+        Добавляет значение и возвращает колебание (max - min) / min * 100 в окне
+        (NaN, пока не накоплено window значений).
+        """
+        position = self.count
+        self.count += 1
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        self.highs.append((position, value))
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.lows.append((position, value))
+
+        oldest = position - self.window + 1
+        while self.highs[0][0] < oldest:
+            self.highs.popleft()
+        while self.lows[0][0] < oldest:
+            self.lows.popleft()
+
+        if self.count < self.window:
+            return float('nan')
+        low = self.lows[0][1]
+        return (self.highs[0][1] - low) / low * 100
+
+
+class StreamingFluctuationScanner:
+    """
+    Поиск сильных колебаний в потоке баров по множеству тикеров.
+    Параметры windows, thresholds и edge_only - как у scan_fluctuations; результаты совпадают с пакетным режимом.
+    """
+
+    def __init__(self, windows=(5, 20), thresholds=5.0, edge_only=True):
+        self.windows = tuple(windows)
+        self.thresholds = thresholds
+        self.edge_only = edge_only
+        self.ranges = {}
+        self.exceeded = {}
+
+    def update(self, ticker, timestamp, close):
+        """
+        Обрабатывает новый бар тикера и возвращает список событий FluctuationAlert (возможно, пустой).
+        """
+        alerts = []
+        for window in self.windows:
+            key = (ticker, window)
+            rolling_range = self.ranges.get(key)
+            if rolling_range is None:
+                rolling_range = self.ranges[key] = RollingRange(window)
+            magnitude = rolling_range.update(float(close))
+            threshold = _threshold_for(self.thresholds, window)
+            exceeded = magnitude > threshold
+            if exceeded and not (self.edge_only and self.exceeded.get(key)):
+                alerts.append(FluctuationAlert(ticker, window, timestamp, magnitude, threshold))
+            self.exceeded[key] = exceeded
+        return alerts
+
+    def update_many(self, bars):
+        """
+        Обрабатывает последовательность баров (ticker, timestamp, close) и возвращает все события.
+        """
+        alerts = []
+        for ticker, timestamp, close in bars:
+            alerts.extend(self.update(ticker, timestamp, close))
+        return alerts
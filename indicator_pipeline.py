@@ -0,0 +1,111 @@
+# Данный модуль отвечает за декларативный расчет технических индикаторов.
+# Пользователь указывает только нужные ему выходные столбцы (например, ["RSI", "MACD"]),
+# а конвейер строит небольшой граф зависимостей, считает общие промежуточные величины (приращения цены, EMA)
+# ровно один раз, освобождает их сразу после использования и не изменяет исходный DataFrame.
+
+import logging
+
+import pandas as pd
+
+from instrumentation import instrument
+
+# Граф индикаторов: название -> (зависимости, функция расчета).
+# Функция получает словарь уже рассчитанных величин и параметры конвейера.
+INDICATOR_GRAPH = {
+    'Moving_Average': (('Close',), lambda v, p: v['Close'].rolling(window=p['window_size']).mean()),
+    'Delta': (('Close',), lambda v, p: v['Close'].diff()),
+    'Gain': (('Delta',), lambda v, p: v['Delta'].where(v['Delta'] > 0, 0)),
+    'Loss': (('Delta',), lambda v, p: -v['Delta'].where(v['Delta'] < 0, 0)),
+    'Avg_Gain': (('Gain',), lambda v, p: v['Gain'].rolling(window=p['rsi_window'], min_periods=1).mean()),
+    'Avg_Loss': (('Loss',), lambda v, p: v['Loss'].rolling(window=p['rsi_window'], min_periods=1).mean()),
+    'RSI': (('Avg_Gain', 'Avg_Loss'), lambda v, p: 100 - (100 / (1 + v['Avg_Gain'] / v['Avg_Loss']))),
+    'EMA_12': (('Close',), lambda v, p: v['Close'].ewm(span=p['short_window'], adjust=False).mean()),
+    'EMA_26': (('Close',), lambda v, p: v['Close'].ewm(span=p['long_window'], adjust=False).mean()),
+    'MACD': (('EMA_12', 'EMA_26'), lambda v, p: v['EMA_12'] - v['EMA_26']),
+    'Signal_Line': (('MACD',), lambda v, p: v['MACD'].ewm(span=p['signal_window'], adjust=False).mean()),
+}
+
+
+class IndicatorPipeline:
+    """
+    Конвейер расчета индикаторов.
+    outputs: список нужных столбцов, например, ['RSI', 'MACD', 'Signal_Line'].
+    window_size, rsi_window, short_window, long_window, signal_window: параметры окон, как в
+    add_moving_average, calculate_rsi и calculate_macd.
+    dtype: тип данных результата, например, 'float32' для уменьшения объема памяти вдвое (None - без изменений).
+    keep_intermediates: если True, промежуточные величины (EMA_12, Delta и т.д.) также попадают в результат.
+    """
+
+    def __init__(self, outputs, window_size=5, rsi_window=14, short_window=12, long_window=26, signal_window=9,
+                 dtype=None, keep_intermediates=False):
+        unknown = [name for name in outputs if name not in INDICATOR_GRAPH]
+        if unknown:
+            raise ValueError(f"Неизвестные индикаторы: {', '.join(unknown)}. "
+                             f"Доступные: {', '.join(INDICATOR_GRAPH)}")
+        self.outputs = list(dict.fromkeys(outputs))
+        self.params = {
+            'window_size': window_size,
+            'rsi_window': rsi_window,
+            'short_window': short_window,
+            'long_window': long_window,
+            'signal_window': signal_window,
+        }
+        self.dtype = dtype
+        self.keep_intermediates = keep_intermediates
+        self.plan = self._build_plan()
+
+    def _build_plan(self):
+        # Топологическая сортировка только тех узлов графа, от которых зависят запрошенные выходы
+        plan = []
+
+        def visit(name):
+            if name == 'Close' or name in plan:
+                return
+            for dependency in INDICATOR_GRAPH[name][0]:
+                visit(dependency)
+            plan.append(name)
+
+        for name in self.outputs:
+            visit(name)
+        return plan
+
+    @instrument('indicator_pipeline')
+    def compute(self, data):
+        """
+        Рассчитывает запрошенные индикаторы по столбцу 'Close' из data.
+        Исходный DataFrame не изменяется; возвращается новый DataFrame с тем же индексом,
+        содержащий только запрошенные столбцы (и промежуточные, если включен keep_intermediates).
+        """
+        keep = set(self.plan) if self.keep_intermediates else set(self.outputs)
+
+        # Сколько еще узлов плана использует каждую величину - чтобы освобождать память сразу после последнего
+        consumers = {}
+        for name in self.plan:
+            for dependency in INDICATOR_GRAPH[name][0]:
+                consumers[dependency] = consumers.get(dependency, 0) + 1
+
+        values = {'Close': data['Close']}
+        result = {}
+        for name in self.plan:
+            dependencies, func = INDICATOR_GRAPH[name]
+            values[name] = func(values, self.params)
+            for dependency in dependencies:
+                consumers[dependency] -= 1
+                if consumers[dependency] == 0:
+                    del values[dependency]
+            if name in keep:
+                result[name] = values[name] if self.dtype is None else values[name].astype(self.dtype)
+                if not consumers.get(name):
+                    del values[name]
+
+        columns = self.outputs + [name for name in self.plan if name in keep and name not in self.outputs]
+        logging.info(f"Индикаторы рассчитаны: {', '.join(columns)}")
+        return pd.DataFrame({name: result[name] for name in columns}, index=data.index)
+
+
+def compute_indicators(data, outputs, **params):
+    """
+    Рассчитывает индикаторы outputs для data и возвращает их в новом DataFrame.
+    params: параметры IndicatorPipeline (окна, dtype, keep_intermediates).
+    """
+    return IndicatorPipeline(outputs, **params).compute(data)
@@ -0,0 +1,177 @@
+# Данный модуль отвечает за замеры производительности этапов обработки: загрузки данных,
+# расчета индикаторов и построения графиков. Для каждого этапа записываются время выполнения,
+# число обработанных строк, объем полученных данных и прирост пикового потребления памяти процессом.
+# Записи хранятся во внутреннем реестре и могут быть выгружены в файл в формате JSON Lines.
+# Замеры дешевые (два обращения к часам и к getrusage), поэтому их можно не отключать в рабочем режиме;
+# полностью отключить их можно функцией set_enabled(False) или переменной окружения DATA_ANALYSIS_METRICS=0.
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # resource недоступен в Windows - пиковая память там не замеряется
+    resource = None
+
+# Включены ли замеры
+enabled = os.environ.get('DATA_ANALYSIS_METRICS', '1') != '0'
+
+# Реестр записей; ограничен по размеру, чтобы долго работающий процесс не накапливал память
+records = deque(maxlen=100000)
+_lock = threading.Lock()
+
+
+def set_enabled(flag=True):
+    """
+    Включает или выключает замеры. В выключенном состоянии декорированные функции вызываются напрямую.
+    """
+    global enabled
+    enabled = flag
+
+
+def get_records():
+    """
+    Возвращает копию списка записей о выполненных этапах.
+    """
+    with _lock:
+        return list(records)
+
+
+def add_records(items):
+    """
+    Добавляет в реестр записи, полученные из другого процесса (например, из рабочего процесса построения графиков).
+    """
+    with _lock:
+        records.extend(items)
+
+
+def clear_records():
+    """
+    Очищает реестр записей.
+    """
+    with _lock:
+        records.clear()
+
+
+def dump_metrics(filename):
+    """
+    Дописывает все накопленные записи в файл в формате JSON Lines (одна запись - одна строка) и очищает реестр.
+    Возвращает число выгруженных записей.
+    """
+    with _lock:
+        items = list(records)
+        records.clear()
+    with open(filename, 'a', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    logging.info(f"Выгружено {len(items)} записей о замерах в {filename}")
+    return len(items)
+
+
+def summarize():
+    """
+    Сводка по этапам: число вызовов, суммарное и максимальное время, число строк и объем данных.
+    """
+    summary = {}
+    for item in get_records():
+        stats = summary.setdefault(item['stage'], {'calls': 0, 'wall_time': 0.0, 'max_wall_time': 0.0,
+                                                   'rows': 0, 'bytes': 0, 'errors': 0})
+        stats['calls'] += 1
+        stats['wall_time'] += item['wall_time']
+        stats['max_wall_time'] = max(stats['max_wall_time'], item['wall_time'])
+        stats['rows'] += item['rows'] or 0
+        stats['bytes'] += item['bytes'] or 0
+        stats['errors'] += item['error'] is not None
+    return summary
+
+
+def _peak_memory():
+    # Пиковый размер резидентной памяти процесса в байтах (ru_maxrss - в КБ в Linux и в байтах в macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class stage:
+    """
+    Контекстный менеджер для замера одного этапа:
+
+        with stage('download', ticker='AAPL') as s:
+            data = ...
+            s.rows = len(data)
+
+    name: название этапа; fields: дополнительные поля записи (например, тикер).
+    Атрибуты rows и bytes можно заполнить внутри блока.
+    """
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.rows = None
+        self.bytes = None
+
+    def __enter__(self):
+        if enabled:
+            self._memory = _peak_memory()
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if not enabled or not hasattr(self, '_started'):
+            return False
+        wall_time = time.perf_counter() - self._started
+        memory = _peak_memory()
+        record = {
+            'stage': self.name,
+            'timestamp': time.time(),
+            'wall_time': wall_time,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'peak_memory_delta': None if memory is None else memory - self._memory,
+            'error': None if exc_type is None else exc_type.__name__,
+            **self.fields,
+        }
+        with _lock:
+            records.append(record)
+        return False
+
+
+def _data_rows(args, kwargs, result):
+    # Число строк берем из первого аргумента-DataFrame (data), а если его нет - из результата
+    data = kwargs.get('data', args[0] if args else None)
+    for candidate in (data, result):
+        if hasattr(candidate, 'shape') and hasattr(candidate, 'index'):
+            return len(candidate)
+    return None
+
+
+def instrument(name=None, measure_bytes=False):
+    """
+    Декоратор для замера функции как этапа с названием name (по умолчанию - имя функции).
+    Число строк определяется по аргументу data или по результату-DataFrame.
+    measure_bytes: записывать объем результата-DataFrame в байтах (для функций загрузки данных).
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with stage(stage_name) as current:
+                result = func(*args, **kwargs)
+                current.rows = _data_rows(args, kwargs, result)
+                if measure_bytes and hasattr(result, 'memory_usage'):
+                    current.bytes = int(result.memory_usage(index=True).sum())
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,10 +1,14 @@
+import sys
+
+import batch_runner
 import data_download as dd
 import data_plotting as dplt
+from indicator_pipeline import IndicatorPipeline
 from datetime import datetime
-import matplotlib.pyplot as plt
 
 
 def main():
+    dd.setup_logging()
     print("Добро пожаловать в инструмент получения и построения графиков биржевых данных.")
     print("Вот несколько примеров биржевых тикеров, которые вы можете рассмотреть: AAPL (Apple Inc), "
           "GOOGL (Alphabet Inc), MSFT (Microsoft Corporation), AMZN (Amazon.com Inc), TSLA (Tesla Inc).")
@@ -40,44 +44,45 @@ def main():
         return
 
 
-    # Добавляем скользящее среднее значение к данным
-    stock_data = dd.add_moving_average(stock_data)
-
-    # Рассчитываем RSI и добавляем его к данным
-    stock_data = dd.calculate_rsi(stock_data)
-
-    # Рассчитываем MACD и добавляем его к данным
-    stock_data = dd.calculate_macd(stock_data)
+    # Рассчитываем скользящее среднее, RSI и MACD за один проход конвейера и добавляем их к данным
+    # (промежуточные EMA в данные не попадают)
+    indicators = IndicatorPipeline(['Moving_Average', 'RSI', 'MACD', 'Signal_Line']).compute(stock_data)
+    stock_data = stock_data.join(indicators)
 
     # Рассчитываем стандартное отклонение цены закрытия
     std_dev = dd.calculate_standard_deviation(stock_data)
 
+    # Подпись периода для заголовков и имен файлов графиков
+    if period_choice == 'custom':
+        label = f"{start_date} to {end_date}"
+    else:
+        label = f"{period} to {period}"
+
     # Визуализация данных с использованием Plotly
-    dplt.plot_interactive_stock_data(stock_data, ticker, f"{start_date if period_choice == 'custom' else period} "
-                                                         f"to {end_date if period_choice == 'custom' else period}")
+    dplt.plot_interactive_stock_data(stock_data, ticker, label)
 
     # Запрашиваем стиль графика и проверяем, поддерживается ли данный стиль
     style = input("Выберите стиль графика (например, 'seaborn', 'ggplot', 'bmh', 'classic' и т.д.):").strip()
+    plt = dplt.load_pyplot()
     if style not in plt.style.available:
         print(f"Стиль '{style}' не поддерживается. Будет использован стиль по умолчанию.")
         style = 'default'
 
     # Строим график данных с добавлением стандартного отклонения
-    dplt.create_and_save_plot(stock_data, ticker, f"{start_date if period_choice == 'custom' 
-    else period} to {end_date if period_choice == 'custom' else period}", style=style)
+    dplt.create_and_save_plot(stock_data, ticker, label, style=style)
 
     # Визуализация стандартного отклонения
-    dplt.plot_standard_deviation(stock_data, ticker, f"{start_date if period_choice == 'custom' else period} "
-                                f"to {end_date if period_choice == 'custom' else period}", std_dev, style=style)
+    dplt.plot_standard_deviation(stock_data, ticker, label, std_dev, style=style)
 
     # Визуализация RSI
-    dplt.plot_rsi(stock_data, ticker, f"{start_date if period_choice == 'custom' 
-    else period} to {end_date if period_choice == 'custom' else period}", style=style)
+    dplt.plot_rsi(stock_data, ticker, label, style=style)
 
     # Визуализация MACD
-    dplt.plot_macd(stock_data, ticker, f"{start_date if period_choice == 'custom' else period} "
-                                       f"to {end_date if period_choice == 'custom' else period}")
+    dplt.plot_macd(stock_data, ticker, label)
 
 
 if __name__ == "__main__":
+    # С аргументами командной строки запускаем неинтерактивный пакетный режим (см. batch_runner.py)
+    if len(sys.argv) > 1:
+        sys.exit(batch_runner.main(sys.argv[1:]))
     main()
@@ -0,0 +1,127 @@
+# Данный модуль отвечает за расчет технических индикаторов сразу для множества тикеров.
+# На вход подается матрица цен закрытия дата x тикер, все индикаторы считаются пакетными операциями NumPy
+# по всем столбцам одновременно и совпадают со значениями однотикерных функций из data_download.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+
+
+def close_panel(frames):
+    """
+    Собирает матрицу цен закрытия дата x тикер из словаря тикер -> DataFrame
+    (например, BatchResult.data из batch_download). Даты объединяются, пропуски заполняются NaN.
+    """
+    return pd.DataFrame({ticker: data['Close'] for ticker, data in frames.items()})
+
+
+def pack_columns(values):
+    """
+    Сдвигает непустые значения каждого столбца вверх с сохранением порядка, а NaN - в конец.
+    Так каждый тикер обрабатывается только по своим торговым дням, как в однотикерных функциях,
+    даже если истории тикеров начинаются в разные даты или содержат пропуски.
+    Возвращает упакованную матрицу и порядок строк для обратного преобразования.
+    """
+    order = np.argsort(np.isnan(values), axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0), order
+
+
+def unpack_columns(packed, order, valid):
+    """
+    Возвращает значения из упакованной матрицы на исходные даты; для дат без данных ставится NaN.
+    valid: маска непустых значений исходной матрицы.
+    """
+    result = np.full(packed.shape, np.nan)
+    np.put_along_axis(result, order, packed, axis=0)
+    result[~valid] = np.nan
+    return result
+
+
+def rolling_mean_2d(values, window, min_periods=None):
+    """
+    Скользящее среднее по столбцам через префиксные суммы (аналог Series.rolling(window, min_periods).mean()).
+    values: упакованная матрица без пропусков внутри истории (NaN допускаются только в конце столбцов).
+    """
+    min_periods = window if min_periods is None else min_periods
+    filled = np.nan_to_num(values)
+    cumsum = np.cumsum(filled, axis=0)
+    sums = cumsum.copy()
+    sums[window:] -= cumsum[:-window]
+
+    counts = np.minimum(np.arange(1, len(values) + 1), window)[:, None].astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = sums / counts
+    result[counts[:, 0] < min_periods] = np.nan
+    return result
+
+
+def ema_2d(values, span):
+    """
+    Экспоненциальное скользящее среднее по столбцам (аналог Series.ewm(span=span, adjust=False).mean()).
+    Рекуррентность вычисляется по строкам, каждая строка - одна векторная операция по всем тикерам.
+    span: число или массив с отдельным значением для каждого столбца.
+    """
+    alpha = 2.0 / (np.asarray(span, dtype=float) + 1.0)
+    result = np.empty_like(values, dtype=float)
+    if len(values) == 0:
+        return result
+    current = values[0].astype(float)
+    result[0] = current
+    for i in range(1, len(values)):
+        current = current + alpha * (values[i] - current)
+        result[i] = current
+    return result
+
+
+def rsi_2d(values, window=14):
+    """
+    RSI по столбцам (аналог calculate_rsi): средние приросты и потери за окно с min_periods=1.
+    """
+    delta = np.empty_like(values, dtype=float)
+    delta[0] = 0.0
+    delta[1:] = np.diff(values, axis=0)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    avg_gain = rolling_mean_2d(gain, window, min_periods=1)
+    avg_loss = rolling_mean_2d(loss, window, min_periods=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+@instrument()
+def calculate_panel_indicators(closes, window_size=5, rsi_window=14, short_window=12, long_window=26,
+                               signal_window=9):
+    """
+    Вычисляет скользящее среднее, RSI, EMA, MACD и сигнальную линию для всех тикеров сразу.
+    closes: DataFrame дата x тикер с ценами закрытия (например, результат close_panel).
+    Параметры окон совпадают с параметрами add_moving_average, calculate_rsi и calculate_macd.
+    Возвращает словарь название индикатора -> DataFrame дата x тикер:
+    'Moving_Average', 'RSI', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line'.
+    """
+    values = closes.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    packed, order = pack_columns(values)
+
+    ema_short = ema_2d(packed, short_window)
+    ema_long = ema_2d(packed, long_window)
+    macd = ema_short - ema_long
+    packed_results = {
+        'Moving_Average': rolling_mean_2d(packed, window_size),
+        'RSI': rsi_2d(packed, rsi_window),
+        'EMA_12': ema_short,
+        'EMA_26': ema_long,
+        'MACD': macd,
+        'Signal_Line': ema_2d(macd, signal_window),
+    }
+
+    results = {
+        name: pd.DataFrame(unpack_columns(result, order, valid), index=closes.index, columns=closes.columns)
+        for name, result in packed_results.items()
+    }
+    logging.info(f"Индикаторы рассчитаны для {closes.shape[1]} тикеров")
+    return results
@@ -0,0 +1,227 @@
+# Данный модуль отвечает за перебор параметров индикаторов (окон скользящего среднего, RSI и MACD)
+# сразу по множеству тикеров. Вместо вызова add_moving_average, calculate_rsi и calculate_macd в цикле
+# по каждому набору параметров общие величины считаются один раз: префиксные суммы цен закрытия,
+# приростов и потерь обслуживают все окна, а EMA считается один раз для каждого уникального окна.
+# Результат - компактный трехмерный массив дата x параметр x тикер; большие сетки можно
+# распределить по пулу процессов, разделив тикеры на группы.
+
+import itertools
+import logging
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+from panel_indicators import ema_2d, pack_columns
+
+
+class SweepResult:
+    """
+    Значения одного индикатора для сетки параметров.
+    values: массив NumPy формы (дата, параметр, тикер);
+    index: даты; params: значения параметра (окно или кортеж окон для MACD); tickers: тикеры.
+    """
+
+    def __init__(self, name, values, index, params, tickers):
+        self.name = name
+        self.values = values
+        self.index = index
+        self.params = list(params)
+        self.tickers = list(tickers)
+
+    def __repr__(self):
+        return (f"SweepResult({self.name!r}, дат: {len(self.index)}, параметров: {len(self.params)}, "
+                f"тикеров: {len(self.tickers)})")
+
+    def frame(self, param):
+        """
+        Значения для одного набора параметров: DataFrame дата x тикер.
+        """
+        return pd.DataFrame(self.values[:, self.params.index(param), :], index=self.index, columns=self.tickers)
+
+    def ticker_frame(self, ticker):
+        """
+        Значения для одного тикера: DataFrame дата x параметр.
+        """
+        return pd.DataFrame(self.values[:, :, self.tickers.index(ticker)], index=self.index,
+                            columns=pd.Index(self.params))
+
+
+def macd_grid(short_windows, long_windows):
+    """
+    Пары окон (short, long) для перебора MACD; пары, в которых короткое окно не меньше длинного, пропускаются.
+    """
+    return [(short, long) for short, long in itertools.product(short_windows, long_windows) if short < long]
+
+
+def _unpack_index(order, valid):
+    # Для каждой исходной ячейки (дата, тикер) - позиция в упакованной матрице (в плоской нумерации);
+    # ячейки без данных указывают на дополнительный элемент NaN за концом матрицы
+    n_rows, n_tickers = order.shape
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_rows)[:, None], axis=0)
+    flat = positions * n_tickers + np.arange(n_tickers)
+    return np.where(valid, flat, n_rows * n_tickers)
+
+
+def _unpack_into(out, packed, index):
+    # Аналог panel_indicators.unpack_columns, записывающий результат в срез out трехмерного массива
+    np.take(np.append(packed.ravel(), np.nan).astype(out.dtype, copy=False), index, out=out)
+
+
+def _prefix_sums(values):
+    cumsum = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=cumsum[1:])
+    return cumsum
+
+
+def _window_sums(cumsum, window):
+    # Суммы в окнах длины window по префиксным суммам; для первых строк окно неполное (как при min_periods=1)
+    sums = cumsum[1:].copy()
+    sums[window:] -= cumsum[1:-window]
+    return sums
+
+
+def _moving_average_grid(packed, windows, index, out):
+    # Скользящие средние для всех окон (аналог add_moving_average): одна префиксная сумма на все окна
+    cumsum = _prefix_sums(np.nan_to_num(packed))
+    for position, window in enumerate(windows):
+        result = _window_sums(cumsum, window) / window
+        result[:window - 1] = np.nan
+        _unpack_into(out[:, position], result, index)
+
+
+def _rsi_grid(packed, windows, index, out):
+    # RSI для всех окон (аналог calculate_rsi): приросты, потери и их префиксные суммы считаются один раз
+    delta = np.zeros_like(packed, dtype=float)
+    delta[1:] = np.diff(packed, axis=0)
+    gain_cumsum = _prefix_sums(np.where(delta > 0, delta, 0.0))
+    loss_cumsum = _prefix_sums(np.where(delta < 0, -delta, 0.0))
+    for position, window in enumerate(windows):
+        # Средние приросты и потери делятся на одно и то же число значений, поэтому их отношение равно отношению сумм
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = 100 - (100 / (1 + _window_sums(gain_cumsum, window) / _window_sums(loss_cumsum, window)))
+        _unpack_into(out[:, position], result, index)
+
+
+def _macd_grids(packed, pairs, signal_windows, index, macd_out, signal_out):
+    # MACD и сигнальные линии (аналог calculate_macd): EMA цены считается один раз для каждого уникального окна,
+    # а сигнальные линии всех пар и окон - одним проходом рекуррентности по строкам.
+    # Если signal_windows пуст, считается только MACD, а signal_out не используется
+    n_rows, n_tickers = packed.shape
+    spans = sorted({window for pair in pairs for window in pair})
+    emas = ema_2d(np.tile(packed, len(spans)), np.repeat(spans, n_tickers)).reshape(n_rows, len(spans), n_tickers)
+    position = {span: i for i, span in enumerate(spans)}
+    macd = np.stack([emas[:, position[short]] - emas[:, position[long]] for short, long in pairs], axis=1)
+    del emas
+    for pair_position in range(len(pairs)):
+        _unpack_into(macd_out[:, pair_position], macd[:, pair_position], index)
+    if not signal_windows:
+        return
+
+    signal_spans = np.repeat(np.asarray(signal_windows), len(pairs) * n_tickers)
+    signal = ema_2d(np.tile(macd.reshape(n_rows, -1), len(signal_windows)), signal_spans)
+    signal = signal.reshape(n_rows, len(signal_windows), len(pairs), n_tickers)
+    for pair_position in range(len(pairs)):
+        # Порядок параметров сигнальной линии: (short, long, signal) для каждой пары и каждого окна сигнала
+        for signal_position in range(len(signal_windows)):
+            _unpack_into(signal_out[:, pair_position * len(signal_windows) + signal_position],
+                         signal[:, signal_position, pair_position], index)
+
+
+def _sweep_block(values, ma_windows, rsi_windows, pairs, signal_windows, outputs):
+    # Перебор параметров для группы тикеров; результаты записываются в массивы outputs (дата, параметр, тикер)
+    valid = ~np.isnan(values)
+    packed, order = pack_columns(values)
+    index = _unpack_index(order, valid)
+    if ma_windows:
+        _moving_average_grid(packed, ma_windows, index, outputs['Moving_Average'])
+    if rsi_windows:
+        _rsi_grid(packed, rsi_windows, index, outputs['RSI'])
+    if pairs:
+        _macd_grids(packed, pairs, signal_windows, index, outputs['MACD'], outputs.get('Signal_Line'))
+
+
+def _sweep_shared(values, ma_windows, rsi_windows, pairs, signal_windows, shared, columns):
+    # Выполняется в рабочем процессе: результаты пишутся прямо в общую память родительского процесса,
+    # чтобы не передавать большие массивы обратно через pickle
+    from multiprocessing import shared_memory
+
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in shared.items()}
+    try:
+        outputs = {name: np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)[:, :, columns]
+                   for name, (_, shape, dtype) in shared.items()}
+        _sweep_block(values, ma_windows, rsi_windows, pairs, signal_windows, outputs)
+        del outputs
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+@instrument()
+def sweep_indicators(closes, ma_windows=None, rsi_windows=None, macd_short=None, macd_long=None, macd_signal=None,
+                     dtype='float64', max_workers=1):
+    """
+    Рассчитывает индикаторы для сетки параметров сразу по всем тикерам.
+    closes: DataFrame дата x тикер с ценами закрытия (например, panel_indicators.close_panel) или Series для одного тикера.
+    ma_windows: окна скользящего среднего, например, range(5, 201).
+    rsi_windows: окна RSI, например, range(2, 51).
+    macd_short, macd_long, macd_signal: окна MACD; перебираются все сочетания с short < long.
+    MACD считается, если заданы macd_short и macd_long, сигнальная линия - если задан также macd_signal.
+    dtype: тип данных результата, например, 'float32' для уменьшения объема памяти вдвое.
+    max_workers: число процессов; тикеры делятся на max_workers групп, а результаты записываются
+    в общую память (1 - расчет в текущем процессе).
+    Возвращает словарь название индикатора -> SweepResult: 'Moving_Average' (параметр - окно), 'RSI' (окно),
+    'MACD' (пара (short, long)) и 'Signal_Line' (тройка (short, long, signal)); в словарь попадают только
+    индикаторы, для которых заданы окна. Значения совпадают с однотикерными функциями data_download.
+    """
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame()
+    values = closes.to_numpy(dtype=float)
+    ma_windows = list(ma_windows or [])
+    rsi_windows = list(rsi_windows or [])
+    pairs = macd_grid(macd_short or [], macd_long or [])
+    if (macd_short or macd_long or macd_signal) and not pairs:
+        raise ValueError("Для перебора MACD нужны окна macd_short и macd_long, хотя бы одна пара с short < long.")
+    signal_windows = list(macd_signal or [])
+    args = (ma_windows, rsi_windows, pairs, signal_windows)
+
+    params = {
+        'Moving_Average': ma_windows,
+        'RSI': rsi_windows,
+        'MACD': pairs,
+        'Signal_Line': [(short, long, signal) for short, long in pairs for signal in signal_windows],
+    }
+    params = {name: items for name, items in params.items() if items}
+    shapes = {name: (values.shape[0], len(items), values.shape[1]) for name, items in params.items()}
+    dtype = np.dtype(dtype)
+
+    groups = np.array_split(np.arange(values.shape[1]), max(1, min(max_workers, values.shape[1])))
+    if len(groups) == 1:
+        outputs = {name: np.empty(shape, dtype=dtype) for name, shape in shapes.items()}
+        _sweep_block(values, *args, outputs)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import shared_memory
+
+        blocks = {name: shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+                  for name, shape in shapes.items()}
+        try:
+            shared = {name: (blocks[name].name, shape, dtype) for name, shape in shapes.items()}
+            with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+                futures = [executor.submit(_sweep_shared, values[:, group], *args, shared,
+                                           slice(group[0], group[-1] + 1))
+                           for group in groups]
+                for future in futures:
+                    future.result()
+            outputs = {name: np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf).copy()
+                       for name, shape in shapes.items()}
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    results = {name: SweepResult(name, outputs[name], closes.index, params[name], closes.columns) for name in params}
+    logging.info(f"Перебор параметров выполнен для {closes.shape[1]} тикеров: "
+                 + ", ".join(f"{name} - {len(result.params)}" for name, result in results.items()))
+    return results
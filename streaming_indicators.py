@@ -0,0 +1,381 @@
+# Данный модуль отвечает за потоковый (инкрементальный) расчет технических индикаторов.
+# Объекты индикаторов инициализируются по историческим данным, а затем принимают новые бары по одному
+# или небольшими пачками и обновляются за O(1) на бар без пересчета всей истории.
+# Состояние индикаторов сериализуется в JSON, чтобы после перезапуска продолжить расчет без полного пересчета.
+
+import json
+import math
+from collections import deque
+
+import pandas as pd
+
+
+class StreamingMovingAverage:
+    """
+    Потоковое скользящее среднее (аналог add_moving_average).
+    window: размер окна; пока накоплено меньше window значений, возвращается NaN.
+    """
+
+    def __init__(self, window=5):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._updates = 0
+
+    @classmethod
+    def from_history(cls, data, window=5):
+        """
+        Создает индикатор по историческим данным (DataFrame со столбцом 'Close').
+        """
+        indicator = cls(window)
+        indicator.values.extend(float(x) for x in data['Close'].iloc[-window:])
+        indicator.total = math.fsum(indicator.values)
+        return indicator
+
+    def update(self, close):
+        """
+        Добавляет новую цену закрытия и возвращает текущее значение скользящего среднего.
+        """
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(float(close))
+        self.total += float(close)
+
+        # Периодически пересчитываем сумму точно, чтобы ошибки округления не накапливались
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self.total = math.fsum(self.values)
+
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.values) < self.window:
+            return math.nan
+        return self.total / self.window
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, state):
+        indicator = cls(state['window'])
+        indicator.values.extend(state['values'])
+        indicator.total = math.fsum(indicator.values)
+        return indicator
+
+
+class StreamingRSI:
+    """
+    Потоковый RSI (аналог calculate_rsi): скользящие суммы приростов и потерь за окно window.
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.gains = deque(maxlen=window)
+        self.losses = deque(maxlen=window)
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.prev_close = None
+        self._updates = 0
+
+    @classmethod
+    def from_history(cls, data, window=14):
+        """
+        Создает индикатор по историческим данным (DataFrame со столбцом 'Close').
+        """
+        indicator = cls(window)
+        close = data['Close']
+        if close.empty:
+            return indicator
+        delta = close.iloc[-(window + 1):].diff()
+        if len(close) <= window:
+            # Первый бар истории входит в окно с нулевым приростом, как в calculate_rsi
+            delta.iloc[0] = 0.0
+        else:
+            delta = delta.iloc[1:]
+        indicator.gains.extend(float(x) for x in delta.clip(lower=0))
+        indicator.losses.extend(float(x) for x in (-delta).clip(lower=0))
+        indicator.gain_total = math.fsum(indicator.gains)
+        indicator.loss_total = math.fsum(indicator.losses)
+        indicator.prev_close = float(close.iloc[-1])
+        return indicator
+
+    def update(self, close):
+        """
+        Добавляет новую цену закрытия и возвращает текущее значение RSI.
+        """
+        close = float(close)
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+
+        if len(self.gains) == self.window:
+            self.gain_total -= self.gains[0]
+            self.loss_total -= self.losses[0]
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.gain_total += gain
+        self.loss_total += loss
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self.gain_total = math.fsum(self.gains)
+            self.loss_total = math.fsum(self.losses)
+
+        return self.value
+
+    @property
+    def value(self):
+        if not self.gains:
+            return math.nan
+        avg_gain = self.gain_total / len(self.gains)
+        avg_loss = self.loss_total / len(self.losses)
+        if avg_loss == 0:
+            # Как и в calculate_rsi: 0/0 дает NaN, а x/0 - бесконечность и RSI = 100
+            return math.nan if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def to_dict(self):
+        return {'window': self.window, 'gains': list(self.gains), 'losses': list(self.losses),
+                'prev_close': self.prev_close}
+
+    @classmethod
+    def from_dict(cls, state):
+        indicator = cls(state['window'])
+        indicator.gains.extend(state['gains'])
+        indicator.losses.extend(state['losses'])
+        indicator.gain_total = math.fsum(indicator.gains)
+        indicator.loss_total = math.fsum(indicator.losses)
+        indicator.prev_close = state['prev_close']
+        return indicator
+
+
+class StreamingEMA:
+    """
+    Потоковая экспоненциальная скользящая средняя (аналог Series.ewm(span=span, adjust=False).mean()).
+    """
+
+    def __init__(self, span, value=None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan if value is None else value
+
+    def update(self, x):
+        x = float(x)
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['span'], state['value'])
+
+
+class StreamingMACD:
+    """
+    Потоковый MACD (аналог calculate_macd): две EMA цены закрытия и EMA от их разности (сигнальная линия).
+    """
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.ema_short = StreamingEMA(short_window)
+        self.ema_long = StreamingEMA(long_window)
+        self.signal = StreamingEMA(signal_window)
+
+    @classmethod
+    def from_history(cls, data, short_window=12, long_window=26, signal_window=9):
+        """
+        Создает индикатор по историческим данным (DataFrame со столбцом 'Close').
+        """
+        indicator = cls(short_window, long_window, signal_window)
+        close = data['Close']
+        if close.empty:
+            return indicator
+        ema_short = close.ewm(span=short_window, adjust=False).mean()
+        ema_long = close.ewm(span=long_window, adjust=False).mean()
+        signal = (ema_short - ema_long).ewm(span=signal_window, adjust=False).mean()
+        indicator.ema_short.value = float(ema_short.iloc[-1])
+        indicator.ema_long.value = float(ema_long.iloc[-1])
+        indicator.signal.value = float(signal.iloc[-1])
+        return indicator
+
+    def update(self, close):
+        """
+        Добавляет новую цену закрытия и возвращает пару (MACD, Signal_Line).
+        """
+        macd = self.ema_short.update(close) - self.ema_long.update(close)
+        return macd, self.signal.update(macd)
+
+    @property
+    def macd(self):
+        return self.ema_short.value - self.ema_long.value
+
+    def to_dict(self):
+        return {'ema_short': self.ema_short.to_dict(), 'ema_long': self.ema_long.to_dict(),
+                'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        indicator = cls()
+        indicator.ema_short = StreamingEMA.from_dict(state['ema_short'])
+        indicator.ema_long = StreamingEMA.from_dict(state['ema_long'])
+        indicator.signal = StreamingEMA.from_dict(state['signal'])
+        return indicator
+
+
+class StreamingIndicators:
+    """
+    Набор потоковых индикаторов, возвращающий на каждый бар те же столбцы, что и пакетные функции:
+    'Moving_Average', 'RSI', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line'.
+    """
+
+    def __init__(self, moving_average, rsi, macd):
+        self.moving_average = moving_average
+        self.rsi = rsi
+        self.macd = macd
+
+    @classmethod
+    def from_history(cls, data, window_size=5, rsi_window=14, short_window=12, long_window=26, signal_window=9):
+        """
+        Создает набор индикаторов по историческим данным (DataFrame со столбцом 'Close').
+        Параметры окон совпадают с параметрами add_moving_average, calculate_rsi и calculate_macd.
+        """
+        return cls(StreamingMovingAverage.from_history(data, window_size),
+                   StreamingRSI.from_history(data, rsi_window),
+                   StreamingMACD.from_history(data, short_window, long_window, signal_window))
+
+    def update(self, close):
+        """
+        Добавляет новую цену закрытия и возвращает словарь со значениями индикаторов на этом баре.
+        """
+        moving_average = self.moving_average.update(close)
+        rsi = self.rsi.update(close)
+        macd, signal = self.macd.update(close)
+        return {
+            'Moving_Average': moving_average,
+            'RSI': rsi,
+            'EMA_12': self.macd.ema_short.value,
+            'EMA_26': self.macd.ema_long.value,
+            'MACD': macd,
+            'Signal_Line': signal,
+        }
+
+    def update_many(self, data):
+        """
+        Добавляет пачку новых баров (DataFrame со столбцом 'Close') и возвращает DataFrame
+        со значениями индикаторов для этих баров (индекс совпадает с индексом data).
+        """
+        rows = [self.update(close) for close in data['Close']]
+        return pd.DataFrame(rows, index=data.index,
+                            columns=['Moving_Average', 'RSI', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line'])
+
+    def to_dict(self):
+        return {'moving_average': self.moving_average.to_dict(), 'rsi': self.rsi.to_dict(),
+                'macd': self.macd.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(StreamingMovingAverage.from_dict(state['moving_average']),
+                   StreamingRSI.from_dict(state['rsi']),
+                   StreamingMACD.from_dict(state['macd']))
+
+    def save(self, filename):
+        """
+        Сохраняет состояние индикаторов в JSON файл.
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Восстанавливает состояние индикаторов из JSON файла, сохраненного методом save.
+        """
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class ChunkedIndicators:
+    """
+    Расчет индикаторов по последовательным порциям (чанкам) длинной истории с ограниченным объемом памяти.
+    Между порциями переносится только состояние прогрева: последние цены закрытия для скользящих окон
+    и последние значения EMA, поэтому результат совпадает с расчетом по всей истории сразу,
+    а в памяти одновременно находится только одна порция.
+    Параметры окон совпадают с параметрами add_moving_average, calculate_rsi и calculate_macd.
+    """
+
+    def __init__(self, window_size=5, rsi_window=14, short_window=12, long_window=26, signal_window=9):
+        self.window_size = window_size
+        self.rsi_window = rsi_window
+        self.short_window = short_window
+        self.long_window = long_window
+        self.signal_window = signal_window
+        self.tail = pd.Series(dtype=float)
+        self.ema_short = None
+        self.ema_long = None
+        self.signal = None
+
+    def _ema(self, values, span, previous):
+        # Значение EMA с прошлой порции ставим первым элементом: при adjust=False рекуррентность
+        # продолжается с него ровно так же, как при расчете по всей истории
+        if previous is None:
+            return values.ewm(span=span, adjust=False).mean()
+        extended = pd.concat([pd.Series([previous]), values], ignore_index=True)
+        result = extended.ewm(span=span, adjust=False).mean().iloc[1:]
+        result.index = values.index
+        return result
+
+    def process(self, chunk):
+        """
+        Рассчитывает индикаторы для очередной порции (DataFrame со столбцом 'Close', строки по возрастанию дат)
+        и возвращает DataFrame со столбцами 'Moving_Average', 'RSI', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line'.
+        """
+        close = chunk['Close'].astype(float)
+        extended = pd.concat([self.tail, close], ignore_index=True)
+        skip = len(self.tail)
+
+        moving_average = extended.rolling(window=self.window_size).mean().iloc[skip:]
+        delta = extended.diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+        avg_gain = gain.rolling(window=self.rsi_window, min_periods=1).mean().iloc[skip:]
+        avg_loss = loss.rolling(window=self.rsi_window, min_periods=1).mean().iloc[skip:]
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        ema_short = self._ema(close, self.short_window, self.ema_short)
+        ema_long = self._ema(close, self.long_window, self.ema_long)
+        macd = ema_short - ema_long
+        signal = self._ema(macd, self.signal_window, self.signal)
+
+        # Сохраняем состояние прогрева для следующей порции
+        keep = max(self.window_size - 1, self.rsi_window)
+        self.tail = extended.iloc[-keep:].reset_index(drop=True) if keep else extended.iloc[0:0]
+        if len(close):
+            self.ema_short = float(ema_short.iloc[-1])
+            self.ema_long = float(ema_long.iloc[-1])
+            self.signal = float(signal.iloc[-1])
+
+        return pd.DataFrame({
+            'Moving_Average': moving_average.to_numpy(),
+            'RSI': rsi.to_numpy(),
+            'EMA_12': ema_short.to_numpy(),
+            'EMA_26': ema_long.to_numpy(),
+            'MACD': macd.to_numpy(),
+            'Signal_Line': signal.to_numpy(),
+        }, index=chunk.index)
+
+
+def iter_indicator_chunks(chunks, **params):
+    """
+    Генератор: принимает последовательность порций данных (например, из chunked_fetch.iter_stock_data_chunks)
+    и для каждой возвращает ее же с добавленными столбцами индикаторов.
+    params: параметры окон ChunkedIndicators.
+    """
+    indicators = ChunkedIndicators(**params)
+    for chunk in chunks:
+        yield chunk.join(indicators.process(chunk))